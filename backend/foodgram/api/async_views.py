@@ -0,0 +1,293 @@
+from math import ceil
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django_filters.utils import translate_validation
+from recipes.models import Ingredient, Tag
+from rest_framework import HTTP_HEADER_ENCODING
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .caching import acached
+from .fieldsets import sparse_fields
+from .filters import IngredientFilterSet, RecipeFilter
+from .pagination import CustomPaginator, acount_rows
+from .projections import RECIPE_FIELDS, project_recipes, recipe_rows
+from .queries import users_for
+from .serializers import (CustomUserListSerializer, OutIngredientSerializer,
+                          TagSerializer)
+from .throttling import (AnonBrowsingThrottle, IngredientSearchThrottle,
+                         PageSizeThrottle)
+
+
+class AsyncAPIError(Exception):
+    """Ошибка, возвращаемая клиенту в формате DRF."""
+
+    def __init__(self, detail, status, headers=None):
+        self.detail = detail
+        self.status = status
+        self.headers = headers or {}
+
+
+def render(data, status=200, headers=None):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    response = HttpResponse(
+        renderer.render(data), status=status,
+        content_type=renderer.media_type
+    )
+    for header, value in (headers or {}).items():
+        response[header] = value
+    return response
+
+
+def authenticate_jwt(raw_token):
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from .authentication import user_from_token
+
+    try:
+        return user_from_token(AccessToken(raw_token))
+    except (TokenError, InvalidToken):
+        raise AsyncAPIError('Given token not valid for any token type', 401,
+                            {'WWW-Authenticate': 'Bearer realm="api"'})
+
+
+async def authenticate(request):
+    """Асинхронный аналог TokenAuthentication и JWT-аутентификации."""
+    auth = request.META.get('HTTP_AUTHORIZATION', '').encode(
+        HTTP_HEADER_ENCODING
+    ).split()
+    if settings.JWT_AUTH and len(auth) == 2 and auth[0].lower() == b'bearer':
+        return authenticate_jwt(auth[1])
+    if not auth or auth[0].lower() != b'token':
+        return AnonymousUser()
+    if len(auth) != 2:
+        raise AsyncAPIError('Invalid token header.', 401,
+                            {'WWW-Authenticate': 'Token'})
+    try:
+        token = await Token.objects.select_related('user').aget(
+            key=auth[1].decode()
+        )
+    except (Token.DoesNotExist, UnicodeError):
+        raise AsyncAPIError('Invalid token.', 401,
+                            {'WWW-Authenticate': 'Token'})
+    if not token.user.is_active:
+        raise AsyncAPIError('User inactive or deleted.', 401,
+                            {'WWW-Authenticate': 'Token'})
+    return token.user
+
+
+@sync_to_async
+def filter_queryset(filterset):
+    """Проверяет параметры фильтра и возвращает отфильтрованный queryset."""
+    if not filterset.is_valid():
+        raise AsyncAPIError(
+            translate_validation(filterset.errors).detail, 400
+        )
+    return filterset.qs
+
+
+async def paginate(request, queryset):
+    """Асинхронная постраничная выборка с ответом как у CustomPaginator."""
+    pagination = CustomPaginator()
+    pagination.request = Request(request)
+    paginator = pagination.django_paginator_class(
+        queryset, pagination.get_page_size(pagination.request)
+    )
+    paginator.count = await acount_rows(queryset)
+    try:
+        page = paginator.page(
+            pagination.get_page_number(pagination.request, paginator)
+        )
+    except InvalidPage:
+        raise AsyncAPIError('Invalid page.', 404)
+    page.object_list = [obj async for obj in page.object_list]
+    pagination.page = page
+    return pagination
+
+
+async def get_object(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise AsyncAPIError('Not found.', 404)
+
+
+@sync_to_async
+def check_throttles(request, throttle_classes):
+    drf_request = Request(request)
+    drf_request.user = request.user
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if throttle.allow_request(drf_request, None):
+            continue
+        wait = throttle.wait()
+        if wait is None:
+            raise AsyncAPIError('Request was throttled.', 429)
+        wait = ceil(wait)
+        raise AsyncAPIError(
+            f'Request was throttled. Expected available in {wait} seconds.',
+            429, {'Retry-After': str(wait)}
+        )
+
+
+def api_view(*throttle_classes):
+    """Аутентификация, ограничение частоты и обработка ошибок."""
+
+    def decorator(view):
+
+        async def wrapper(request, *args, **kwargs):
+            try:
+                request.user = await authenticate(request)
+                await check_throttles(request, throttle_classes)
+                return await view(request, *args, **kwargs)
+            except AsyncAPIError as error:
+                detail = error.detail
+                if isinstance(detail, str):
+                    detail = {'detail': detail}
+                return render(detail, error.status, error.headers)
+            except ValidationError as error:
+                return render(error.detail, error.status_code)
+
+        return wrapper
+
+    return decorator
+
+
+async def recipe_page(request):
+    fields = sparse_fields(request.GET, RECIPE_FIELDS)
+    filterset = RecipeFilter(
+        request.GET, queryset=recipe_rows(request.user, fields=fields),
+        request=request
+    )
+    pagination = await paginate(request, await filter_queryset(filterset))
+    recipes = await sync_to_async(project_recipes)(
+        pagination.page.object_list, request, fields
+    )
+    return pagination.get_paginated_response(recipes).data
+
+
+@api_view(AnonBrowsingThrottle, PageSizeThrottle)
+async def recipe_list(request):
+    if request.user.is_authenticated:
+        return render(await recipe_page(request))
+    return render(
+        await acached('recipes', request, lambda: recipe_page(request))
+    )
+
+
+@api_view(AnonBrowsingThrottle)
+async def recipe_detail(request, pk):
+    fields = sparse_fields(request.GET, RECIPE_FIELDS)
+    row = await get_object(recipe_rows(request.user, fields=fields), pk=pk)
+    recipes = await sync_to_async(project_recipes)([row], request, fields)
+    return render(recipes[0])
+
+
+@api_view(AnonBrowsingThrottle)
+async def tag_list(request):
+
+    async def build():
+        tags = [tag async for tag in Tag.objects.all()]
+        return TagSerializer(tags, many=True).data
+
+    return render(await acached('tags', request, build))
+
+
+@api_view(AnonBrowsingThrottle)
+async def tag_detail(request, pk):
+    tag = await get_object(Tag.objects.all(), pk=pk)
+    return render(TagSerializer(tag).data)
+
+
+@api_view(AnonBrowsingThrottle, IngredientSearchThrottle)
+async def ingredient_list(request):
+
+    async def build():
+        filterset = IngredientFilterSet(
+            request.GET, queryset=Ingredient.objects.all(), request=request
+        )
+        ingredients = [
+            ingredient
+            async for ingredient in await filter_queryset(filterset)
+        ]
+        return OutIngredientSerializer(ingredients, many=True).data
+
+    return render(await acached('ingredients', request, build))
+
+
+@api_view(AnonBrowsingThrottle)
+async def ingredient_detail(request, pk):
+    ingredient = await get_object(Ingredient.objects.all(), pk=pk)
+    return render(OutIngredientSerializer(ingredient).data)
+
+
+def user_fields(request):
+    return sparse_fields(request.GET, CustomUserListSerializer.Meta.fields)
+
+
+@api_view(AnonBrowsingThrottle, PageSizeThrottle)
+async def user_list(request):
+    pagination = await paginate(request, users_for(
+        request.user, 'is_subscribed' in user_fields(request)
+    ))
+    serializer = CustomUserListSerializer(
+        pagination.page.object_list, many=True, context={'request': request}
+    )
+    return render(pagination.get_paginated_response(serializer.data).data)
+
+
+@api_view(AnonBrowsingThrottle)
+async def user_detail(request, id):
+    user = await get_object(users_for(
+        request.user, 'is_subscribed' in user_fields(request)
+    ), pk=id)
+    return render(
+        CustomUserListSerializer(user, context={'request': request}).data
+    )
+
+
+def read_only_async(async_view, sync_view):
+    """Отдает GET асинхронному представлению, остальное - ViewSet."""
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+def counterparts():
+    """Асинхронные GET-представления и ViewSet, которые они заменяют.
+
+    Ключ - имя URL, как в api.urls.
+    """
+    from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
+                        TagViewSet)
+
+    views = {
+        'recipe': (recipe_list, recipe_detail, RecipeViewSet),
+        'tag': (tag_list, tag_detail, TagViewSet),
+        'ingredient': (
+            ingredient_list, ingredient_detail, IngredientViewSet
+        ),
+        'customuser': (user_list, user_detail, CustomUserViewSet),
+    }
+    pairs = {}
+    for name, (list_view, detail_view, viewset) in views.items():
+        pairs[f'{name}-list'] = (
+            list_view, viewset.as_view({'get': 'list'})
+        )
+        pairs[f'{name}-detail'] = (
+            detail_view, viewset.as_view({'get': 'retrieve'})
+        )
+    return pairs
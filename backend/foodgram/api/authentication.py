@@ -0,0 +1,59 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from users.models import CustomUser
+
+TOKEN_USER_CLAIMS = (
+    'email', 'username', 'first_name', 'last_name', 'is_staff'
+)
+
+
+def user_from_token(validated_token):
+    """Пользователь, собранный из утверждений токена без запроса к БД."""
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(
+            'Token contained no recognizable user identification'
+        )
+    user = CustomUser(
+        id=user_id,
+        is_active=True,
+        **{
+            claim: validated_token[claim]
+            for claim in TOKEN_USER_CLAIMS if claim in validated_token
+        }
+    )
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса к БД для чтения.
+
+    Изменяющие запросы получают пользователя из БД, чтобы сохранение
+    объекта пользователя не затирало поля, которых нет в токене.
+    """
+
+    def authenticate(self, request):
+        self.safe_method = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.safe_method:
+            return user_from_token(validated_token)
+        return super().get_user(validated_token)
+
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Выдача JWT с данными профиля для аутентификации без БД."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in TOKEN_USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
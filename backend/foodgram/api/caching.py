@@ -0,0 +1,58 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import observe_cache
+
+MISSING = object()
+
+
+def generation(name):
+    """Поколение данных name; меняется при каждом их изменении."""
+    return cache.get_or_set(f'generation:{name}', time.time_ns(), None)
+
+
+def invalidate(*names):
+    cache.set_many(
+        {f'generation:{name}': time.time_ns() for name in names}, None
+    )
+
+
+def request_key(request):
+    """Ключ ответа: хост, путь и параметры запроса без учета порядка."""
+    query = '&'.join(
+        f'{name}={value}' for name, values in sorted(request.GET.lists())
+        for value in values
+    )
+    return f'{request.get_host()}{request.path}?{query}'
+
+
+def lookup(name, request):
+    key = f'{name}:{generation(name)}:{request_key(request)}'
+    data = cache.get(key, MISSING)
+    observe_cache(name, data is not MISSING)
+    return key, data
+
+
+def cached(name, request, build):
+    """Данные ответа из общего кэша или построенные build()."""
+    key, data = lookup(name, request)
+    if data is MISSING:
+        data = build()
+        cache.set(key, data, settings.API_CACHE_TIMEOUTS[name])
+    return data
+
+
+async def acached(name, request, build):
+    """То же, что cached, для асинхронной функции build.
+
+    Кэш синхронный и может ждать блокировки файла, поэтому обращения к нему
+    выполняются вне цикла событий.
+    """
+    key, data = await sync_to_async(lookup)(name, request)
+    if data is MISSING:
+        data = await build()
+        await cache.aset(key, data, settings.API_CACHE_TIMEOUTS[name])
+    return data
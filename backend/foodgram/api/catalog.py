@@ -0,0 +1,66 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from recipes.models import Ingredient
+
+from .caching import generation
+from .compression import compress, negotiate
+from .renderers import ORJSONRenderer
+from .serializers import OutIngredientSerializer
+
+ENCODINGS = {'br': 11, 'gzip': 9}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+_loaded = {'generation': None, 'snapshot': None}
+
+
+def build_snapshot():
+    """JSON всех ингредиентов, его хэш и заранее сжатые варианты."""
+    body = ORJSONRenderer().render(OutIngredientSerializer(
+        Ingredient.objects.all(), many=True
+    ).data)
+    snapshot = {
+        'version': hashlib.sha256(body).hexdigest()[:16],
+        'identity': body,
+    }
+    for encoding, level in ENCODINGS.items():
+        snapshot[encoding] = compress(body, encoding, level)
+    return snapshot
+
+
+def get_snapshot():
+    """Снимок каталога; пересобирается только после изменения ингредиентов.
+
+    Хранится в общем кэше, воркер держит у себя последнюю версию.
+    """
+    current = generation('ingredients')
+    if _loaded['generation'] != current:
+        key = f'ingredient_catalog:{current}'
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = build_snapshot()
+            cache.set(key, snapshot, None)
+        _loaded.update(generation=current, snapshot=snapshot)
+    return _loaded['snapshot']
+
+
+def snapshot_response(request, snapshot):
+    """Ответ с подходящим по Accept-Encoding вариантом снимка."""
+    etag = f'"{snapshot["version"]}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        encoding = negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), tuple(ENCODINGS)
+        )
+        response = HttpResponse(
+            snapshot[encoding or 'identity'],
+            content_type='application/json'
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = IMMUTABLE
+    response['Vary'] = 'Accept-Encoding'
+    return response
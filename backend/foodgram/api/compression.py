@@ -0,0 +1,85 @@
+import zlib
+
+import brotli
+
+GZIP_WBITS = zlib.MAX_WBITS | 16
+
+
+def parse_accept_encoding(header):
+    """Кодировки из Accept-Encoding с их весами q."""
+    weights = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def negotiate(header, encodings):
+    """Лучшая из поддерживаемых кодировок, при равных весах - первая."""
+    weights = parse_accept_encoding(header)
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class GzipCompressor:
+
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+
+    def process(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def brotli_compressor(level):
+    return brotli.Compressor(quality=level)
+
+
+COMPRESSORS = {
+    'br': brotli_compressor,
+    'gzip': GzipCompressor,
+}
+
+
+def compress(data, encoding, level):
+    compressor = COMPRESSORS[encoding](level)
+    return compressor.process(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding, level):
+    """Сжимает поток, отдавая каждую часть сразу, без ожидания конца."""
+    compressor = COMPRESSORS[encoding](level)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding, level):
+    compressor = COMPRESSORS[encoding](level)
+    async for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
@@ -0,0 +1,94 @@
+from itertools import islice
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.db import connections, router
+from django.db.models import Count
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+from users.models import CustomUser
+
+from .projections import ingredients_by_recipe, tags_by_recipe
+from .renderers import ORJSON_OPTIONS, encoder_default
+
+RECIPE_COLUMNS = ('id', 'name', 'text', 'cooking_time', 'image', 'author_id')
+AUTHOR_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name')
+
+
+def recipe_chunks(chunk_size):
+    """Строки рецептов пачками по chunk_size в порядке id.
+
+    Читает через серверный курсор. Если серверные курсоры отключены
+    (режим пулера соединений), читает постранично по id.
+    """
+    rows = Recipe.objects.order_by('id').values(*RECIPE_COLUMNS)
+    database = connections[router.db_for_read(Recipe)]
+    if not database.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        iterator = rows.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]['id']
+
+
+def counts_by_recipe(model, recipe_ids):
+    return dict(
+        model.objects.filter(recipe_id__in=recipe_ids).order_by().values(
+            'recipe_id'
+        ).annotate(count=Count('id')).values_list('recipe_id', 'count')
+    )
+
+
+def export_chunk(rows):
+    """NDJSON для пачки рецептов; связанные данные - запросом на пачку."""
+    recipe_ids = [row['id'] for row in rows]
+    tags = tags_by_recipe(recipe_ids)
+    ingredients = ingredients_by_recipe(recipe_ids)
+    authors = {
+        author['id']: author for author in CustomUser.objects.filter(
+            id__in={row['author_id'] for row in rows}
+        ).values(*AUTHOR_FIELDS)
+    }
+    favorites = counts_by_recipe(FavoriteRecipe, recipe_ids)
+    carts = counts_by_recipe(ShoppingCart, recipe_ids)
+    lines = []
+    for row in rows:
+        recipe_id = row['id']
+        lines.append(orjson.dumps({
+            'id': recipe_id,
+            'name': row['name'],
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+            'image': row['image'] or None,
+            'author': authors[row['author_id']],
+            'tags': tags[recipe_id],
+            'ingredients': ingredients[recipe_id],
+            'favorites_count': favorites.get(recipe_id, 0),
+            'shopping_cart_count': carts.get(recipe_id, 0),
+        }, default=encoder_default,
+            option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE))
+    return b''.join(lines)
+
+
+def export_recipes(chunk_size):
+    """Все рецепты в NDJSON, по одному куску bytes на пачку."""
+    for rows in recipe_chunks(chunk_size):
+        yield export_chunk(rows)
+
+
+async def aexport_recipes(chunk_size):
+    """export_recipes для ASGI: пачки читаются в потоке соединения с БД."""
+    chunks = export_recipes(chunk_size)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
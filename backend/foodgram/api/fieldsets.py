@@ -0,0 +1,48 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
+
+
+def parse_field_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def sparse_fields(query_params, available):
+    """Поля ответа с учетом параметров ?fields= и ?omit=.
+
+    Порядок полей остается таким же, как в available.
+    """
+    fields = parse_field_names(query_params.get('fields', ''))
+    omit = parse_field_names(query_params.get('omit', ''))
+    for param, names in (('fields', fields), ('omit', omit)):
+        unknown = names.difference(available)
+        if unknown:
+            raise ValidationError({param: [
+                'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            ]})
+    return tuple(
+        name for name in available
+        if (not fields or name in fields) and name not in omit
+    )
+
+
+class SparseFieldsMixin:
+    """Поля сериализатора верхнего уровня по ?fields= и ?omit=.
+
+    Исключенные поля не вычисляются, в том числе SerializerMethodField.
+    """
+
+    def is_top_level(self):
+        return self.parent is None or (
+            isinstance(self.parent, ListSerializer)
+            and self.parent.parent is None
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not self.is_top_level():
+            return fields
+        return {
+            name: fields[name]
+            for name in sparse_fields(request.GET, tuple(fields))
+        }
@@ -14,6 +14,12 @@ class IngredientFilterSet(FilterSet):
         fields = ('name',)
 
 
+RANKINGS = {
+    'popular': ('-popularity', '-id'),
+    'trending': ('-trending', '-id'),
+}
+
+
 class RecipeFilter(FilterSet):
     """Фильтр рецептов."""
     tags = filters.ModelMultipleChoiceFilter(
@@ -27,6 +33,10 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter'
     )
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'popular'), ('trending', 'trending')),
+        method='ordering_filter'
+    )
 
     class Meta:
         model = Recipe
@@ -35,7 +45,7 @@ class RecipeFilter(FilterSet):
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(favoriterecipe__user=user)
+            return queryset.filter(favorite_recipe__user=user)
         return queryset
 
     def is_in_shopping_cart_filter(self, queryset, name, value):
@@ -43,3 +53,6 @@ class RecipeFilter(FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(cart_recipe__user=user)
         return queryset
+
+    def ordering_filter(self, queryset, name, value):
+        return queryset.order_by(*RANKINGS[value])
@@ -0,0 +1,315 @@
+import base64
+import binascii
+import uuid
+from itertools import chain
+
+import orjson
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from recipes.journal import record_changes
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import CustomUser
+from utils.static_params import LEN_200
+from utils.validators import validate_less_than_zero, validate_required
+
+from .caching import invalidate
+
+REQUIRED = 'Обязательное поле.'
+image_storage = Recipe._meta.get_field('image').storage
+image_upload_to = Recipe._meta.get_field('image').upload_to
+
+
+def read_records(stream):
+    """Записи из NDJSON или JSON-массива: пары (номер записи, данные).
+
+    NDJSON читается построчно, строка с некорректным JSON становится
+    записью с ошибкой, а не прерывает загрузку.
+    """
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if first == b'[':
+        try:
+            records = orjson.loads(first + stream.read())
+        except orjson.JSONDecodeError:
+            yield 1, None
+            return
+        yield from enumerate(records, 1)
+        return
+    if not first:
+        return
+    number = 0
+    for line in chain([first + stream.readline()], stream):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield number, None
+
+
+def check(errors, field, value, *validators):
+    for validator in validators:
+        try:
+            validator(value)
+        except ValidationError as error:
+            errors.setdefault(field, []).extend(error.messages)
+            return False
+    return True
+
+
+def positive_int(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValidationError('Введите целое число.')
+    validate_less_than_zero(value)
+
+
+def short_text(value):
+    validate_required(value)
+    if not isinstance(value, str):
+        raise ValidationError('Введите строку.')
+    if len(value) > LEN_200:
+        raise ValidationError(f'Не больше {LEN_200} символов.')
+
+
+def is_key(value):
+    """Строка, число или кортеж из них - ключ словаря ссылок."""
+    if isinstance(value, tuple):
+        return all(map(is_key, value))
+    return isinstance(value, (int, str))
+
+
+def text(value):
+    validate_required(value)
+    if not isinstance(value, str):
+        raise ValidationError('Введите строку.')
+
+
+class RecipeImporter:
+    """Массовая загрузка рецептов с проверкой ссылок по словарям в памяти.
+
+    Теги и ингредиенты задаются по id, а при match='name' - по slug тега
+    и паре (название, единица измерения) ингредиента, как в выгрузке
+    export_recipes. Рецепты, связи с тегами и ингредиенты вставляются
+    пачками по batch_size, каждая пачка - в своей транзакции.
+    """
+
+    def __init__(self, author, batch_size=500, match='id'):
+        self.author = author
+        self.batch_size = batch_size
+        self.match = match
+        if match == 'name':
+            self.tags = dict(Tag.objects.values_list('slug', 'id'))
+            self.ingredients = {
+                (name, unit): ingredient_id
+                for ingredient_id, name, unit in
+                Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                )
+            }
+        else:
+            self.tags = {
+                tag_id: tag_id
+                for tag_id in Tag.objects.values_list('id', flat=True)
+            }
+            self.ingredients = {
+                ingredient_id: ingredient_id for ingredient_id in
+                Ingredient.objects.values_list('id', flat=True)
+            }
+        self.authors = {}
+        self.created = 0
+        self.errors = []
+
+    def tag_key(self, tag):
+        if isinstance(tag, dict):
+            return tag.get('slug' if self.match == 'name' else 'id')
+        return tag
+
+    def ingredient_key(self, ingredient):
+        if self.match == 'name':
+            return (ingredient.get('name'), ingredient.get('measurement_unit'))
+        return ingredient.get('id')
+
+    def author_id(self, record, errors):
+        author = record.get('author')
+        if author is None:
+            return self.author.id
+        email = author.get('email') if isinstance(author, dict) else author
+        if not isinstance(email, str):
+            errors['author'] = ['Укажите email автора.']
+            return None
+        if email not in self.authors:
+            self.authors[email] = CustomUser.objects.filter(
+                email=email
+            ).values_list('id', flat=True).first()
+        if self.authors[email] is None:
+            errors['author'] = [f'Пользователь {email} не найден.']
+        return self.authors[email]
+
+    def validate(self, record):
+        """Проверенный рецепт и ошибки по полям."""
+        if not isinstance(record, dict):
+            return None, {'non_field_errors': ['Ожидается JSON-объект.']}
+        errors = {}
+        check(errors, 'name', record.get('name'), short_text)
+        check(errors, 'text', record.get('text'), text)
+        check(errors, 'cooking_time', record.get('cooking_time'),
+              validate_required, positive_int)
+        tags = self.validate_tags(record.get('tags'), errors)
+        ingredients = self.validate_ingredients(
+            record.get('ingredients'), errors
+        )
+        author_id = self.author_id(record, errors)
+        image = self.validate_image(record.get('image'), errors)
+        if errors:
+            return None, errors
+        upload = image if isinstance(image, ContentFile) else None
+        return {
+            'recipe': Recipe(
+                name=record['name'], text=record['text'],
+                cooking_time=record['cooking_time'], author_id=author_id,
+                image=None if upload else image,
+            ),
+            'tags': tags,
+            'ingredients': ingredients,
+            'image': upload,
+        }, errors
+
+    def validate_tags(self, tags, errors):
+        if not tags or not isinstance(tags, list):
+            errors['tags'] = [REQUIRED]
+            return None
+        tag_ids = []
+        for tag in tags:
+            key = self.tag_key(tag)
+            tag_id = self.tags.get(key) if is_key(key) else None
+            if tag_id is None:
+                errors.setdefault('tags', []).append(
+                    f'Тег {key} не найден.'
+                )
+            elif tag_id not in tag_ids:
+                tag_ids.append(tag_id)
+        return tag_ids
+
+    def validate_ingredients(self, ingredients, errors):
+        if not ingredients or not isinstance(ingredients, list):
+            errors['ingredients'] = [REQUIRED]
+            return None
+        amounts = {}
+        for ingredient in ingredients:
+            if not isinstance(ingredient, dict):
+                errors.setdefault('ingredients', []).append(
+                    'Ожидается JSON-объект.'
+                )
+                continue
+            key = self.ingredient_key(ingredient)
+            ingredient_id = (
+                self.ingredients.get(key) if is_key(key) else None
+            )
+            if ingredient_id is None:
+                errors.setdefault('ingredients', []).append(
+                    f'Ингредиент {key} не найден.'
+                )
+            elif ingredient_id in amounts:
+                errors.setdefault('ingredients', []).append(
+                    'Ингредиенты не должны повторяться.'
+                )
+            elif check(errors, 'ingredients', ingredient.get('amount'),
+                       validate_required, positive_int):
+                amounts[ingredient_id] = ingredient['amount']
+        return amounts
+
+    def validate_image(self, image, errors):
+        """Имя существующего файла в хранилище или декодированный файл.
+
+        data:image;base64 проверяется как в API, а сохраняется только при
+        вставке пачки, чтобы записи с ошибками не оставляли файлов.
+        """
+        if not image:
+            return None
+        if not isinstance(image, str):
+            errors['image'] = ['Введите строку.']
+            return None
+        if not image.startswith('data:image'):
+            if not image_storage.exists(image):
+                errors['image'] = [f'Файл {image} не найден.']
+            return image
+        try:
+            header, data = image.split(';base64,')
+            content = ContentFile(
+                base64.b64decode(data, validate=True),
+                name=f'{uuid.uuid4().hex}.{header.split("/")[-1]}'
+            )
+            forms.ImageField().to_python(content)
+        except (ValueError, binascii.Error, ValidationError):
+            errors['image'] = ['Некорректное изображение.']
+            return None
+        content.seek(0)
+        return content
+
+    def run(self, records):
+        """Загружает записи (номер, данные) и возвращает отчет."""
+        batch = []
+        for number, record in records:
+            if record is None:
+                self.errors.append({
+                    'record': number,
+                    'errors': {'non_field_errors': ['Некорректный JSON.']},
+                })
+                continue
+            recipe, errors = self.validate(record)
+            if errors:
+                self.errors.append({'record': number, 'errors': errors})
+                continue
+            batch.append(recipe)
+            if len(batch) >= self.batch_size:
+                self.insert(batch)
+                batch = []
+        if batch:
+            self.insert(batch)
+        return {'created': self.created, 'errors': self.errors}
+
+    def insert(self, batch):
+        """Сохраняет изображения и записи пачки.
+
+        Если пачка не вставилась, уже сохраненные изображения удаляются.
+        """
+        saved = []
+        try:
+            for item in batch:
+                if item['image'] is not None:
+                    saved.append(image_storage.save(
+                        f'{image_upload_to}{item["image"].name}',
+                        item['image']
+                    ))
+                    item['recipe'].image = saved[-1]
+            self.insert_rows(batch)
+        except Exception:
+            for name in saved:
+                image_storage.delete(name)
+            raise
+
+    @transaction.atomic
+    def insert_rows(self, batch):
+        recipes = Recipe.objects.bulk_create(
+            [item['recipe'] for item in batch]
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+            for recipe, item in zip(recipes, batch)
+            for tag_id in item['tags']
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe_id=recipe.id, ingredient_id=ingredient_id,
+                amount=amount
+            )
+            for recipe, item in zip(recipes, batch)
+            for ingredient_id, amount in item['ingredients'].items()
+        )
+        record_changes(recipe.id for recipe in recipes)
+        transaction.on_commit(lambda: invalidate('recipes'))
+        self.created += len(recipes)
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.urls import Resolver404, resolve
+from rest_framework.authtoken.models import Token
+
+from api.async_views import counterparts
+from api.warmup import warm_up_host
+
+URLS = (
+    '/api/recipes/', '/api/tags/', '/api/ingredients/?name=а', '/api/users/'
+)
+DUMMY_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+def shares(total, workers):
+    return [
+        total // workers + (number < total % workers)
+        for number in range(workers)
+    ]
+
+
+def call(view, request, kwargs):
+    start = time.perf_counter()
+    response = view(request, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response.status_code, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = ('compare throughput and latency of the async API views with '
+            'the sync ViewSets under concurrent requests')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append',
+            help='GET endpoint to measure, repeatable; '
+                 'the main read endpoints by default'
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--user', type=int,
+            help='id of a user with an API token to send requests as, '
+                 'anonymous by default'
+        )
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='bypass the API response cache'
+        )
+
+    def handle(self, *args, **options):
+        headers = {'HTTP_HOST': warm_up_host()}
+        if options['user']:
+            token = Token.objects.filter(user_id=options['user']).first()
+            if token is None:
+                raise CommandError('The user has no API token.')
+            headers['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        views = counterparts()
+        factory = RequestFactory()
+        caches = {**settings.CACHES, 'throttle': DUMMY_CACHE}
+        if options['no_cache']:
+            caches['default'] = DUMMY_CACHE
+        with override_settings(CACHES=caches):
+            for url in options['url'] or URLS:
+                try:
+                    match = resolve(urlsplit(url).path)
+                except Resolver404:
+                    raise CommandError(f'{url} is not an API endpoint.')
+                if match.url_name not in views:
+                    raise CommandError(f'{url} has no async view.')
+                async_view, sync_view = views[match.url_name]
+
+                def make_request(url=url):
+                    return factory.get(url, **headers)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(url))
+                for name, run in (('sync', self.run_sync),
+                                  ('async', self.run_async)):
+                    view = sync_view if name == 'sync' else async_view
+                    run(view, make_request, match.kwargs, 1, 1)
+                    start = time.perf_counter()
+                    results = run(
+                        view, make_request, match.kwargs,
+                        options['requests'], options['concurrency']
+                    )
+                    self.report(name, results, time.perf_counter() - start)
+
+    def run_sync(self, view, make_request, kwargs, total, concurrency):
+        """Запросы к ViewSet в пуле потоков, как в воркере с потоками."""
+
+        def worker(count):
+            try:
+                return [
+                    call(view, make_request(), kwargs) for _ in range(count)
+                ]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return [
+                result
+                for results in executor.map(
+                    worker, shares(total, concurrency)
+                )
+                for result in results
+            ]
+
+    def run_async(self, view, make_request, kwargs, total, concurrency):
+        """Запросы к асинхронному представлению в одном цикле событий."""
+
+        async def worker(count):
+            results = []
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await view(make_request(), **kwargs)
+                results.append(
+                    (response.status_code, time.perf_counter() - start)
+                )
+            return results
+
+        async def run():
+            return await asyncio.gather(*(
+                worker(count) for count in shares(total, concurrency)
+            ))
+
+        return [
+            result
+            for results in async_to_sync(run)()
+            for result in results
+        ]
+
+    def report(self, name, results, elapsed):
+        statuses = sorted({status for status, _ in results})
+        latencies = [latency * 1000 for _, latency in results]
+        if len(latencies) > 1:
+            percentiles = quantiles(latencies, n=20)
+            p50, p95 = percentiles[9], percentiles[18]
+        else:
+            p50 = p95 = latencies[0]
+        self.stdout.write(
+            f'  {name:<6} {len(results) / elapsed:>8.1f} req/s '
+            f'p50 {p50:>7.1f} ms  p95 {p95:>7.1f} ms  '
+            f'status {",".join(map(str, statuses))}'
+        )
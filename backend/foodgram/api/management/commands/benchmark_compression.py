@@ -0,0 +1,48 @@
+import time
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from api.compression import compress
+from api.warmup import warm_up_host
+
+DEFAULT_URLS = ('/api/recipes/', '/api/recipes/?limit=50', '/api/ingredients/')
+DEFAULT_LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 6, 11)}
+
+
+class Command(BaseCommand):
+    help = 'compare response sizes and CPU cost of gzip and brotli levels'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help='API path to benchmark, can be repeated'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST=warm_up_host())
+        for url in options['urls'] or DEFAULT_URLS:
+            response = client.get(url)
+            if response.status_code != 200 or response.streaming:
+                raise CommandError(
+                    f'{url} returned {response.status_code}'
+                )
+            content = response.content
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{url}: {len(content)} bytes'
+            ))
+            for encoding, levels in DEFAULT_LEVELS.items():
+                for level in levels:
+                    timings = []
+                    for _ in range(options['repeat']):
+                        start = time.perf_counter()
+                        compressed = compress(content, encoding, level)
+                        timings.append(time.perf_counter() - start)
+                    self.stdout.write(
+                        f'  {encoding:<4} level {level:<2} '
+                        f'{len(compressed):>9} bytes '
+                        f'{len(compressed) / len(content):>7.1%} '
+                        f'{median(timings) * 1000:>8.2f} ms'
+                    )
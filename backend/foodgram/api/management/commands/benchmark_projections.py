@@ -0,0 +1,87 @@
+import time
+from statistics import median
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from recipes.models import Recipe
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from users.models import CustomUser
+
+from api.fieldsets import sparse_fields
+from api.projections import RECIPE_FIELDS, project_recipes, recipe_rows
+from api.serializers import RecipeSerializer
+from api.warmup import warm_up_host
+
+
+class Command(BaseCommand):
+    help = ('check that the recipe list projection matches RecipeSerializer '
+            'byte for byte and compare their CPU time')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int,
+            help='id of the user to render for, anonymous by default'
+        )
+        parser.add_argument(
+            '--fields', default='',
+            help='comma-separated fields, as in ?fields= of /api/recipes/'
+        )
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get(
+            '/api/recipes/', {'fields': options['fields']},
+            HTTP_HOST=warm_up_host()
+        )
+        try:
+            fields = sparse_fields(request.GET, RECIPE_FIELDS)
+        except ValidationError as error:
+            raise CommandError(error.detail['fields'][0])
+        request.user = (
+            CustomUser.objects.get(pk=options['user'])
+            if options['user'] else AnonymousUser()
+        )
+        ids = list(
+            Recipe.objects.values_list('id', flat=True)[:options['limit']]
+        )
+        if not ids:
+            raise CommandError('There are no recipes to compare.')
+
+        def serialize():
+            recipes = Recipe.objects.filter(id__in=ids)
+            return [
+                {name: recipe[name] for name in fields}
+                for recipe in RecipeSerializer(
+                    recipes, many=True, context={'request': request}
+                ).data
+            ]
+
+        def project():
+            return project_recipes(
+                recipe_rows(request.user, fields=fields).filter(id__in=ids),
+                request, fields
+            )
+
+        renderer = JSONRenderer()
+        expected = renderer.render(serialize())
+        actual = renderer.render(project())
+        if actual != expected:
+            raise CommandError('Projection output differs from serializer.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(ids)} recipes, {len(actual)} bytes, output is identical.'
+        ))
+        for name, build in (('serializer', serialize),
+                            ('projection', project)):
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.process_time()
+                build()
+                timings.append(time.process_time() - start)
+            per_recipe = median(timings) / len(ids) * 1000
+            self.stdout.write(
+                f'{name:<11} {median(timings) * 1000:>8.2f} ms CPU '
+                f'{per_recipe:>7.3f} ms per recipe'
+            )
@@ -0,0 +1,49 @@
+import time
+import tracemalloc
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import ORJSONRenderer
+from api.warmup import warm_up_host
+
+RENDERERS = (JSONRenderer, ORJSONRenderer)
+
+
+class Command(BaseCommand):
+    help = 'compare encode time and memory of the JSON renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/recipes/?limit=100')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        response = Client(HTTP_HOST=warm_up_host()).get(options['url'])
+        data = getattr(response, 'data', None)
+        if response.status_code != 200 or data is None:
+            raise CommandError(
+                f'{options["url"]} returned {response.status_code}'
+            )
+        outputs = {}
+        for renderer_class in RENDERERS:
+            renderer = renderer_class()
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                renderer.render(data)
+                timings.append(time.perf_counter() - start)
+            tracemalloc.start()
+            outputs[renderer_class] = renderer.render(data)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.stdout.write(
+                f'{renderer_class.__name__:<16} '
+                f'{len(outputs[renderer_class]):>9} bytes '
+                f'{median(timings) * 1000:>8.2f} ms '
+                f'{peak / 1024:>9.1f} KiB peak'
+            )
+        if len(set(outputs.values())) != 1:
+            raise CommandError('renderers produced different output')
+        self.stdout.write(self.style.SUCCESS('Output is identical.'))
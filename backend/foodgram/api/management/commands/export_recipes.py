@@ -0,0 +1,37 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.export import export_recipes
+
+
+class Command(BaseCommand):
+    help = ('export recipes with ingredients, tags, authors and '
+            'favorite/cart counts as NDJSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='file to write to, standard output by default'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE,
+            help='recipes read from the database at a time'
+        )
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, options['chunk_size'])
+            return
+        with open(options['output'], 'wb') as output:
+            count = self.write(output, options['chunk_size'])
+        self.stderr.write(f'Exported {count} recipes.')
+
+    def write(self, output, chunk_size):
+        count = 0
+        for chunk in export_recipes(chunk_size):
+            output.write(chunk)
+            count += chunk.count(b'\n')
+        output.flush()
+        return count
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from statistics import median
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'wsgi': (
+        'import foodgram.wsgi; '
+        'from django.urls import get_resolver; get_resolver().url_patterns'
+    ),
+    'manage': (
+        'import django; django.setup(); '
+        'from django.core.management import get_commands; get_commands()'
+    ),
+}
+HEAVY_MODULES = ('numpy', 'scipy', 'pyinstrument', 'weasyprint')
+
+
+def import_times(code):
+    """Время импорта модулей по python -X importtime, в микросекундах."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'),
+    )
+    wall = time.perf_counter() - start
+    if result.returncode:
+        raise CommandError(result.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split(
+            '|'
+        )
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules, wall
+
+
+class Command(BaseCommand):
+    help = ('report import time per module for worker and manage.py '
+            'startup and check it against a budget')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', choices=tuple(TARGETS), action='append',
+            help='startup to measure, both by default'
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument(
+            '--budget-ms', type=float,
+            help='fail if total import time exceeds this budget or heavy '
+                 'optional modules are imported at startup'
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        for target in options['target'] or TARGETS:
+            runs = [
+                import_times(TARGETS[target])
+                for _ in range(options['repeat'])
+            ]
+            modules = runs[-1][0]
+            total_ms = median(
+                sum(self_us for self_us, _ in run.values()) / 1000
+                for run, _ in runs
+            )
+            wall_ms = median(wall for _, wall in runs) * 1000
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{target}: {total_ms:.0f} ms importing {len(modules)} '
+                f'modules, {wall_ms:.0f} ms process start'
+            ))
+            self.report(modules, options['top'])
+            heavy = sorted(
+                name for name in modules if name in HEAVY_MODULES
+            )
+            if heavy:
+                self.stdout.write(self.style.WARNING(
+                    'Heavy modules imported at startup: ' + ', '.join(heavy)
+                ))
+            budget = options['budget_ms']
+            if budget is not None and (total_ms > budget or heavy):
+                failures.append(target)
+        if failures:
+            raise CommandError(
+                'Startup is over budget: ' + ', '.join(failures)
+            )
+
+    def report(self, modules, top):
+        packages = defaultdict(int)
+        for name, (self_us, _) in modules.items():
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write('  by package (self time):')
+        for name, self_us in sorted(
+            packages.items(), key=lambda item: -item[1]
+        )[:top]:
+            self.stdout.write(f'    {self_us / 1000:>8.1f} ms  {name}')
+        self.stdout.write('  by module (cumulative):')
+        for name, (_, cumulative_us) in sorted(
+            modules.items(), key=lambda item: -item[1][1]
+        )[:top]:
+            self.stdout.write(f'    {cumulative_us / 1000:>8.1f} ms  {name}')
@@ -0,0 +1,45 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users.models import CustomUser
+
+from api.importer import RecipeImporter, read_records
+
+
+class Command(BaseCommand):
+    help = 'bulk import recipes from NDJSON or a JSON array'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="file to read, '-' for stdin")
+        parser.add_argument(
+            '--author', required=True,
+            help='email of the author for records without one'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--match', choices=('id', 'name'), default='id',
+            help='look tags and ingredients up by id, or by tag slug and '
+                 'ingredient name and measurement unit'
+        )
+
+    def handle(self, *args, **options):
+        author = CustomUser.objects.filter(email=options['author']).first()
+        if author is None:
+            raise CommandError(f"User {options['author']} does not exist.")
+        importer = RecipeImporter(
+            author, options['batch_size'], options['match']
+        )
+        if options['path'] == '-':
+            report = importer.run(read_records(sys.stdin.buffer))
+        else:
+            with open(options['path'], 'rb') as source:
+                report = importer.run(read_records(source))
+        for error in report['errors']:
+            self.stderr.write(f"record {error['record']}: {error['errors']}")
+        self.stdout.write(
+            f"Created {report['created']} recipes, "
+            f"{len(report['errors'])} records rejected."
+        )
@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.slow_queries import fingerprint, read_log
+
+ORDERINGS = {
+    'total': lambda group: group['total_ms'],
+    'max': lambda group: group['max_ms'],
+    'count': lambda group: group['count'],
+}
+
+
+class Command(BaseCommand):
+    help = 'show the slowest captured SQL queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--order-by', choices=ORDERINGS, default='total'
+        )
+        parser.add_argument(
+            '--plans', action='store_true',
+            help='print EXPLAIN plans of the slowest samples'
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='remove captured queries after printing'
+        )
+
+    def handle(self, *args, **options):
+        groups = defaultdict(lambda: {
+            'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'views': set(), 'slowest': None, 'plan': None,
+        })
+        for entry in read_log():
+            group = groups[fingerprint(entry['sql'])]
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            if entry['view']:
+                group['views'].add(entry['view'])
+            if entry['duration_ms'] > group['max_ms']:
+                group['max_ms'] = entry['duration_ms']
+                group['slowest'] = entry
+            if entry['plan'] and (
+                group['plan'] is None
+                or entry['duration_ms'] >= group['plan']['duration_ms']
+            ):
+                group['plan'] = entry
+        ranked = sorted(
+            groups.items(), key=lambda item: ORDERINGS[
+                options['order_by']
+            ](item[1]), reverse=True
+        )[:options['limit']]
+        if not ranked:
+            self.stdout.write('No slow queries captured.')
+        for position, (sql, group) in enumerate(ranked, start=1):
+            slowest = group['slowest']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'#{position}: {group["count"]} calls, '
+                f'total {group["total_ms"]:.1f} ms, '
+                f'avg {group["total_ms"] / group["count"]:.1f} ms, '
+                f'max {group["max_ms"]:.1f} ms'
+            ))
+            self.stdout.write(f'  views: {", ".join(sorted(group["views"]))}')
+            self.stdout.write(f'  origin: {slowest["origin"]}')
+            self.stdout.write(f'  params: {slowest["params"]}')
+            self.stdout.write(f'  sql: {sql}')
+            if options['plans'] and group['plan']:
+                self.stdout.write(group['plan']['plan'])
+        if options['clear']:
+            open(settings.SLOW_QUERY['LOG_FILE'], 'w').close()
@@ -0,0 +1,45 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+REQUEST_LATENCY = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса.',
+    ('view', 'method'),
+)
+RESPONSES = Counter(
+    'foodgram_responses_total',
+    'Ответы по кодам статуса.',
+    ('view', 'method', 'status'),
+)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries_per_request',
+    'Количество SQL-запросов на один запрос.',
+    ('view',),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Попадания и промахи кэша.',
+    ('cache', 'result'),
+)
+
+
+def observe_cache(cache_name, hit):
+    """Учитывает обращение к кэшу."""
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+def metrics_view(request):
+    """Метрики в формате Prometheus по всем процессам gunicorn."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
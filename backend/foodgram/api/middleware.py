@@ -0,0 +1,471 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+from hashlib import sha256
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from foodgram.db_router import REPLICA, use_replica
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+
+from .compression import (acompress_stream, compress, compress_stream,
+                          negotiate)
+from .metrics import DB_QUERIES, REQUEST_LATENCY, RESPONSES
+from .profiling import (RequestProfiler, SQLLog, is_staff, save_capture,
+                        wants_profile)
+from .slow_queries import SlowQueryRecorder
+
+logger = logging.getLogger('foodgram.timing')
+
+_request_metrics = ContextVar('request_metrics', default=None)
+
+
+def wrap_connections(wrapper):
+    """Подключает обертку выполнения SQL ко всем соединениям с БД."""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+    return stack
+
+
+@asynccontextmanager
+async def awrap_connections(wrapper):
+    """wrap_connections для ASGI.
+
+    Соединения с БД у каждого потока свои, а запросы асинхронного
+    обработчика выполняются в общем для всего запроса потоке
+    sync_to_async(thread_sensitive=True). Обертка подключается там же.
+    """
+    stack = await sync_to_async(wrap_connections)(wrapper)
+    try:
+        yield
+    finally:
+        await sync_to_async(stack.close)()
+
+
+class HybridMiddleware:
+    """Middleware, работающий и в WSGI, и в ASGI без адаптации.
+
+    Как MiddlewareMixin в Django: если следующий обработчик асинхронный,
+    вызов возвращает корутину __acall__. Иначе Django переводил бы всю
+    цепочку ASGI в синхронный режим.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class RequestMetrics:
+    """Счетчики SQL-запросов и времени одного HTTP-запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.compress_time = 0.0
+        self.active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def track(self):
+        return wrap_connections(self)
+
+    def atrack(self):
+        return awrap_connections(self)
+
+
+def timed(metric):
+    """Добавляет время вызова к счетчику metric текущего запроса.
+
+    Учитывается только внешний вызов: вложенные сериализаторы и
+    повторный вызов render из родительского класса не считаются дважды.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            metrics = _request_metrics.get()
+            if metrics is None or metric in metrics.active:
+                return method(*args, **kwargs)
+            metrics.active.add(metric)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                setattr(metrics, metric, getattr(metrics, metric)
+                        + time.perf_counter() - start)
+                metrics.active.discard(metric)
+
+        wrapper.is_timed = True
+        return wrapper
+
+    return decorator
+
+
+def install_timing():
+    """Замер сериализаторов DRF и рендереров ответа.
+
+    Проекции из api.projections отмечены timed('serializer_time') сами.
+    """
+    targets = [
+        (serializers.Serializer, 'to_representation', 'serializer_time'),
+        (serializers.ListSerializer, 'to_representation', 'serializer_time'),
+    ] + [
+        (renderer_class, 'render', 'render_time')
+        for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+    for cls, name, metric in targets:
+        method = getattr(cls, name)
+        if not getattr(method, 'is_timed', False):
+            setattr(cls, name, timed(metric)(method))
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    """Заголовок Server-Timing и лог медленных запросов."""
+
+    def __init__(self, get_response):
+        options = settings.SERVER_TIMING
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.sample_rate = options['SAMPLE_RATE']
+        self.slow_request_ms = options['SLOW_REQUEST_MS']
+        install_timing()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with metrics.track():
+                response = self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        return self.process_response(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            async with metrics.atrack():
+                response = await self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        return self.process_response(request, response, metrics, start)
+
+    def process_response(self, request, response, metrics, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        view_name = (
+            request.resolver_match.view_name
+            if request.resolver_match else None
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+            f'render;dur={metrics.render_time * 1000:.1f}',
+            f'compress;dur={metrics.compress_time * 1000:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ))
+        if total_ms >= self.slow_request_ms:
+            logger.info(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'view': view_name,
+                'status': response.status_code,
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 1),
+                'serializer_ms': round(metrics.serializer_time * 1000, 1),
+                'render_ms': round(metrics.render_time * 1000, 1),
+                'compress_ms': round(metrics.compress_time * 1000, 1),
+                'total_ms': round(total_ms, 1),
+            }, ensure_ascii=False))
+        return response
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Сжатие ответов Brotli или gzip по заголовку Accept-Encoding.
+
+    Ответы меньше MIN_SIZE, уже сжатые и с Cache-Control: no-transform
+    отдаются как есть. Потоковые ответы сжимаются по частям.
+    """
+
+    encodings = ('br', 'gzip')
+
+    def __init__(self, get_response):
+        options = settings.COMPRESSION
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.min_size = options['MIN_SIZE']
+        self.levels = {
+            'br': options['BROTLI_LEVEL'],
+            'gzip': options['GZIP_LEVEL'],
+        }
+        self.content_types = tuple(options['CONTENT_TYPES'])
+
+    def should_compress(self, response):
+        if (response.status_code in (204, 206, 304)
+                or response.has_header('Content-Encoding')
+                or 'no-transform' in response.get('Cache-Control', '')):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if not content_type.startswith(self.content_types):
+            return False
+        return response.streaming or len(response.content) >= self.min_size
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming:
+            return self.process_response(request, response)
+        return await sync_to_async(self.process_response)(request, response)
+
+    def process_response(self, request, response):
+        if not self.should_compress(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings
+        )
+        if encoding is None:
+            return response
+        level = self.levels[encoding]
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, encoding, level
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, encoding, level
+                )
+            del response['Content-Length']
+        else:
+            start = time.perf_counter()
+            content = compress(response.content, encoding, level)
+            metrics = _request_metrics.get()
+            if metrics is not None:
+                metrics.compress_time += time.perf_counter() - start
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Сбор метрик Prometheus по маршрутам DRF."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request_metrics = RequestMetrics()
+        start = time.perf_counter()
+        with request_metrics.track():
+            response = self.get_response(request)
+        return self.observe(request, response, request_metrics, start)
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        start = time.perf_counter()
+        async with request_metrics.atrack():
+            response = await self.get_response(request)
+        return self.observe(request, response, request_metrics, start)
+
+    def observe(self, request, response, request_metrics, start):
+        duration = time.perf_counter() - start
+        view_name = (
+            request.resolver_match.view_name
+            if request.resolver_match else 'unresolved'
+        )
+        REQUEST_LATENCY.labels(view_name, request.method).observe(duration)
+        RESPONSES.labels(
+            view_name, request.method, response.status_code
+        ).inc()
+        DB_QUERIES.labels(view_name).observe(request_metrics.queries)
+        return response
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """Сохранение медленных SQL-запросов с планами выполнения."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with wrap_connections(SlowQueryRecorder(request)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with awrap_connections(SlowQueryRecorder(request)):
+            return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Направляет чтение из API на реплику, кроме недавно писавших клиентов.
+
+    После изменяющего запроса клиент закрепляется за основной БД на
+    REPLICA_STICKY_SECONDS: браузер через cookie, остальные клиенты по
+    заголовку Authorization.
+    """
+
+    cookie_name = 'db_primary'
+
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.sticky_seconds = settings.REPLICA_STICKY_SECONDS
+
+    @staticmethod
+    def pin_key(request):
+        auth = request.META.get('HTTP_AUTHORIZATION')
+        if not auth:
+            return None
+        return 'db-primary:' + sha256(auth.encode()).hexdigest()
+
+    def pin(self, response):
+        response.set_cookie(
+            self.cookie_name, '1', max_age=self.sticky_seconds,
+            httponly=True, samesite='Lax'
+        )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        pin_key = self.pin_key(request)
+        if request.method not in SAFE_METHODS:
+            response = self.pin(self.get_response(request))
+            if pin_key:
+                cache.set(pin_key, True, self.sticky_seconds)
+            return response
+        pinned = (
+            self.cookie_name in request.COOKIES
+            or (pin_key is not None and cache.get(pin_key, False))
+        )
+        token = use_replica.set(
+            request.path.startswith('/api/') and not pinned
+        )
+        try:
+            return self.get_response(request)
+        finally:
+            use_replica.reset(token)
+
+    async def __acall__(self, request):
+        pin_key = self.pin_key(request)
+        if request.method not in SAFE_METHODS:
+            response = self.pin(await self.get_response(request))
+            if pin_key:
+                await cache.aset(pin_key, True, self.sticky_seconds)
+            return response
+        pinned = (
+            self.cookie_name in request.COOKIES
+            or (pin_key is not None and await cache.aget(pin_key, False))
+        )
+        token = use_replica.set(
+            request.path.startswith('/api/') and not pinned
+        )
+        try:
+            return await self.get_response(request)
+        finally:
+            use_replica.reset(token)
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """Профилирование отдельных запросов сотрудников.
+
+    Запрос с заголовком X-Profile или параметром ?_profile выполняется под
+    профилировщиком, профиль и журнал SQL сохраняются в PROFILING['DIR'],
+    а имя профиля возвращается в заголовке X-Profile-Id. Остальные
+    запросы проходят без изменений. Содержимое потоковых ответов
+    формируется после выхода из профилировщика и в профиль не попадает.
+    В ASGI профилируется поток цикла событий: код в sync_to_async виден
+    в профиле только как ожидание, а его SQL - в журнале запросов.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not wants_profile(request) or not is_staff(request):
+            return self.get_response(request)
+        sql_log = SQLLog()
+        start = time.perf_counter()
+        with wrap_connections(sql_log), RequestProfiler() as profiler:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        response['X-Profile-Id'] = save_capture(
+            request, response, profiler, sql_log, duration
+        )
+        return response
+
+    async def __acall__(self, request):
+        if not wants_profile(request) or not await sync_to_async(is_staff)(
+            request
+        ):
+            return await self.get_response(request)
+        sql_log = SQLLog()
+        start = time.perf_counter()
+        async with awrap_connections(sql_log):
+            with RequestProfiler() as profiler:
+                response = await self.get_response(request)
+        duration = time.perf_counter() - start
+        response['X-Profile-Id'] = await sync_to_async(save_capture)(
+            request, response, profiler, sql_log, duration
+        )
+        return response
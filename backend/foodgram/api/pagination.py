@@ -1,7 +1,83 @@
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 
 
+def count_key(queryset):
+    """Ключ кэша по SQL условий запроса и их параметрам.
+
+    Выбранные поля, аннотации и сортировка на число строк не влияют и в
+    ключ не входят, поэтому выборки с разными полями и аннотациями
+    пользователя (is_favorited и т.п.) делят один ключ.
+    """
+    query = queryset.query.chain()
+    query.clear_ordering(force=True)
+    query.clear_select_clause()
+    sql, params = query.sql_with_params()
+    signature = f'{queryset.db}:{sql}:{params!r}'.encode()
+    return 'count:' + hashlib.sha256(signature).hexdigest()
+
+
+def planner_estimate(queryset):
+    """Оценка числа строк планировщиком PostgreSQL или None."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_rows(queryset):
+    """Число строк по режиму PAGINATION_COUNT['MODE'].
+
+    cached - точный COUNT(*), который кэшируется на TIMEOUT секунд для
+    одинаковых запросов. estimate - то же, но если планировщик оценивает
+    выборку больше чем в ESTIMATE_THRESHOLD строк, отдается его оценка.
+    """
+    options = settings.PAGINATION_COUNT
+    if options['MODE'] == 'exact':
+        return queryset.count()
+    try:
+        key = count_key(queryset)
+    except EmptyResultSet:
+        return 0
+    count = cache.get(key)
+    if count is None:
+        if options['MODE'] == 'estimate':
+            count = planner_estimate(queryset)
+        if count is None or count <= options['ESTIMATE_THRESHOLD']:
+            count = queryset.count()
+        cache.set(key, count, options['TIMEOUT'])
+    return count
+
+
+async def acount_rows(queryset):
+    if settings.PAGINATION_COUNT['MODE'] == 'exact':
+        return await queryset.acount()
+    return await sync_to_async(count_rows)(queryset)
+
+
+class CountingPaginator(Paginator):
+    """Paginator, считающий строки через count_rows."""
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return count_rows(self.object_list)
+        return super().count
+
+
 class CustomPaginator(PageNumberPagination):
     """Пагинация."""
+    django_paginator_class = CountingPaginator
     page_size_query_param = 'limit'
     page_size = 6
+    max_page_size = settings.MAX_PAGE_SIZE
@@ -0,0 +1,198 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .slow_queries import redact_params
+
+QUERY_PARAM = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+CAPTURE_RE = re.compile(r'^[0-9T-]+-[0-9a-f]{8}$')
+FILES = ('profile.html', 'profile.prof', 'profile.txt', 'sql.json')
+
+
+def profiles_dir():
+    return settings.PROFILING['DIR']
+
+
+def wants_profile(request):
+    """Запрос просит профилирование заголовком X-Profile или ?_profile."""
+    return HEADER in request.META or (
+        QUERY_PARAM in request.META.get('QUERY_STRING', '')
+        and QUERY_PARAM in request.GET
+    )
+
+
+def is_staff(request):
+    """Сотрудник ли автор запроса, с учетом аутентификации API."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        drf_request = Request(request, authenticators=[
+            authentication()
+            for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ])
+        try:
+            user = drf_request.user
+        except APIException:
+            return False
+    return bool(user and user.is_staff)
+
+
+class SQLLog:
+    """Обертка выполнения SQL, записывающая все запросы и их время."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': None if many else redact_params(params),
+                'many': many,
+                'duration_ms': round(
+                    (time.perf_counter() - start) * 1000, 3
+                ),
+                'database': context['connection'].alias,
+            })
+
+
+class RequestProfiler:
+    """Сэмплирующий pyinstrument, если он установлен, иначе cProfile."""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            self.name = 'cProfile'
+            self.profiler = cProfile.Profile()
+        else:
+            self.name = 'pyinstrument'
+            self.profiler = Profiler()
+
+    def __enter__(self):
+        if self.name == 'cProfile':
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.name == 'cProfile':
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+    def save(self, path):
+        if self.name == 'pyinstrument':
+            with open(os.path.join(path, 'profile.html'), 'w') as output:
+                output.write(self.profiler.output_html())
+            return
+        self.profiler.dump_stats(os.path.join(path, 'profile.prof'))
+        summary = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=summary)
+        stats.sort_stats('cumulative').print_stats(60)
+        with open(os.path.join(path, 'profile.txt'), 'w') as output:
+            output.write(summary.getvalue())
+
+
+def save_capture(request, response, profiler, sql_log, duration):
+    """Сохраняет профиль, SQL-журнал и описание запроса, возвращает имя."""
+    now = datetime.now(timezone.utc)
+    name = f'{now:%Y%m%dT%H%M%S%f}-{uuid4().hex[:8]}'
+    path = os.path.join(profiles_dir(), name)
+    os.makedirs(path)
+    profiler.save(path)
+    with open(os.path.join(path, 'sql.json'), 'w') as output:
+        json.dump(sql_log.queries, output, ensure_ascii=False, indent=1)
+    meta = {
+        'name': name,
+        'created': now.isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': getattr(request.user, 'email', None),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 1),
+        'queries': len(sql_log.queries),
+        'db_ms': round(sum(
+            query['duration_ms'] for query in sql_log.queries
+        ), 1),
+        'profiler': profiler.name,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as output:
+        json.dump(meta, output, ensure_ascii=False)
+    prune(settings.PROFILING['KEEP'])
+    return name
+
+
+def list_captures():
+    """Описания сохраненных профилей, новые первыми."""
+    directory = profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    captures = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not CAPTURE_RE.match(name):
+            continue
+        try:
+            with open(os.path.join(directory, name, 'meta.json')) as meta:
+                capture = json.load(meta)
+        except (OSError, ValueError):
+            continue
+        capture['files'] = [
+            file_name for file_name in FILES
+            if os.path.exists(os.path.join(directory, name, file_name))
+        ]
+        captures.append(capture)
+    return captures
+
+
+def prune(keep):
+    """Оставляет keep последних профилей."""
+    directory = profiles_dir()
+    names = sorted(
+        name for name in os.listdir(directory) if CAPTURE_RE.match(name)
+    )
+    for name in names[:-keep] if keep else names:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+@staff_member_required
+def profiles_view(request):
+    """Страница админки со списком профилей."""
+    return TemplateResponse(request, 'admin/profiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'captures': list_captures(),
+    })
+
+
+@staff_member_required
+def profile_file_view(request, name, file_name):
+    """Скачивание файла профиля."""
+    path = os.path.join(profiles_dir(), name, file_name)
+    if (not CAPTURE_RE.match(name) or file_name not in FILES
+            or not os.path.exists(path)):
+        raise Http404
+    return FileResponse(
+        open(path, 'rb'), as_attachment=file_name != 'profile.html',
+        filename=f'{name}-{file_name}'
+    )
@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from recipes.models import Recipe, RecipeIngredient
+from users.models import CustomUser
+
+from .middleware import timed
+from .queries import annotate_recipes, annotate_users
+
+RECIPE_FIELDS = (
+    'id', 'tags', 'author', 'ingredients', 'is_favorited',
+    'is_in_shopping_cart', 'image', 'name', 'text', 'cooking_time',
+)
+RELATED_FIELDS = ('tags', 'ingredients')
+COLUMNS = {'author': 'author_id'}
+USER_FIELDS = (
+    'id', 'email', 'username', 'first_name', 'last_name', 'is_subscribed',
+)
+
+image_storage = Recipe._meta.get_field('image').storage
+
+
+def recipe_rows(user, queryset=None, fields=RECIPE_FIELDS):
+    """Строки рецептов для project_recipes, без создания моделей.
+
+    Выбираются только столбцы и аннотации, нужные для полей fields.
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    columns = ['id'] + [
+        COLUMNS.get(name, name) for name in fields
+        if name != 'id' and name not in RELATED_FIELDS
+    ]
+    return annotate_recipes(queryset, user).values(*columns)
+
+
+def tags_by_recipe(recipe_ids):
+    tags = defaultdict(list)
+    rows = Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('tag_id').values_list(
+        'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+    )
+    for recipe_id, tag_id, name, color, slug in rows:
+        tags[recipe_id].append(
+            {'id': tag_id, 'name': name, 'color': color, 'slug': slug}
+        )
+    return tags
+
+
+def ingredients_by_recipe(recipe_ids):
+    ingredients = defaultdict(list)
+    rows = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('id').values_list(
+        'recipe_id', 'ingredient_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    )
+    for recipe_id, ingredient_id, name, measurement_unit, amount in rows:
+        ingredients[recipe_id].append({
+            'id': ingredient_id,
+            'name': name,
+            'measurement_unit': measurement_unit,
+            'amount': amount,
+        })
+    return ingredients
+
+
+def authors_by_id(author_ids, user):
+    rows = annotate_users(
+        CustomUser.objects.filter(id__in=author_ids), user
+    ).values_list(*USER_FIELDS)
+    return {row[0]: dict(zip(USER_FIELDS, row)) for row in rows}
+
+
+def image_url(name, request):
+    """Ссылка на изображение, как ее отдает Base64ImageField."""
+    if not name:
+        return None
+    url = image_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def row_value(name):
+    return lambda row, related, request: row[name]
+
+
+FIELD_BUILDERS = {
+    'id': row_value('id'),
+    'tags': lambda row, related, request: related['tags'][row['id']],
+    'author': lambda row, related, request: (
+        related['author'][row['author_id']]
+    ),
+    'ingredients': lambda row, related, request: (
+        related['ingredients'][row['id']]
+    ),
+    'is_favorited': row_value('is_favorited'),
+    'is_in_shopping_cart': row_value('is_in_shopping_cart'),
+    'image': lambda row, related, request: image_url(row['image'], request),
+    'name': row_value('name'),
+    'text': row_value('text'),
+    'cooking_time': row_value('cooking_time'),
+}
+
+
+@timed('serializer_time')
+def project_recipes(rows, request, fields=RECIPE_FIELDS):
+    """JSON рецептов в формате RecipeSerializer из строк recipe_rows.
+
+    Теги, ингредиенты и авторы загружаются одним запросом каждый на всю
+    страницу и только если они входят в fields. В Server-Timing время
+    проекции учитывается как serializer.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    recipe_ids = [row['id'] for row in rows]
+    related = {}
+    if 'tags' in fields:
+        related['tags'] = tags_by_recipe(recipe_ids)
+    if 'ingredients' in fields:
+        related['ingredients'] = ingredients_by_recipe(recipe_ids)
+    if 'author' in fields:
+        related['author'] = authors_by_id(
+            {row['author_id'] for row in rows}, request.user
+        )
+    builders = [(name, FIELD_BUILDERS[name]) for name in fields]
+    return [
+        {name: build(row, related, request) for name, build in builders}
+        for row in rows
+    ]
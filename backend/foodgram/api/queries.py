@@ -0,0 +1,36 @@
+from django.db.models import Exists, OuterRef, Value
+from recipes.models import FavoriteRecipe, ShoppingCart
+from users.models import CustomUser, FollowUser
+
+
+def annotate_users(queryset, user):
+    """Добавляет пользователям флаг подписки текущего пользователя."""
+    if user.is_anonymous:
+        return queryset.annotate(is_subscribed=Value(False))
+    return queryset.annotate(is_subscribed=Exists(
+        FollowUser.objects.filter(user=user, author=OuterRef('pk'))
+    ))
+
+
+def users_for(user, is_subscribed=True):
+    """Пользователи для чтения без дополнительных запросов."""
+    queryset = CustomUser.objects.order_by('id')
+    if not is_subscribed:
+        return queryset
+    return annotate_users(queryset, user)
+
+
+def annotate_recipes(queryset, user):
+    """Добавляет рецептам флаги избранного и корзины."""
+    if user.is_anonymous:
+        return queryset.annotate(
+            is_favorited=Value(False), is_in_shopping_cart=Value(False)
+        )
+    return queryset.annotate(
+        is_favorited=Exists(FavoriteRecipe.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )),
+        is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )),
+    )
@@ -0,0 +1,56 @@
+from django.db import connections, router
+from django.utils import timezone
+
+
+def add_relation(model, user, target, target_id):
+    """Добавляет связь пользователя с объектом одним запросом.
+
+    INSERT ... SELECT берет объект из его таблицы, поэтому для
+    несуществующего объекта строка не вставляется, а ON CONFLICT DO NOTHING
+    по уникальному ограничению (user, target) делает повторное добавление
+    безопасным при одновременных запросах. Возвращает True, если связь
+    добавлена, и False, если она уже была или объекта нет.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    meta = model._meta
+    target_field = meta.get_field(target)
+    target_meta = target_field.related_model._meta
+    target_pk = quote(target_meta.pk.column)
+    key = [quote(meta.get_field('user').column), quote(target_field.column)]
+    columns, values, params = list(key), ['%s', target_pk], [user.id]
+    if any(field.name == 'created' for field in meta.concrete_fields):
+        created = meta.get_field('created')
+        columns.append(quote(created.column))
+        values.append('%s')
+        params.append(
+            created.get_db_prep_value(timezone.now(), connection)
+        )
+    sql = (
+        f'INSERT INTO {quote(meta.db_table)} ({", ".join(columns)}) '
+        f'SELECT {", ".join(values)} FROM {quote(target_meta.db_table)} '
+        f'WHERE {target_pk} = %s '
+        f'ON CONFLICT ({", ".join(key)}) DO NOTHING'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [target_id])
+        return cursor.rowcount > 0
+
+
+def remove_relation(model, user, target, target_id):
+    """Удаляет связь одним DELETE; True, если она была.
+
+    Сигналы удаления не отправляются: у моделей связей нет ни
+    обработчиков, ни зависимых объектов.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    meta = model._meta
+    sql = (
+        f'DELETE FROM {quote(meta.db_table)} '
+        f'WHERE {quote(meta.get_field("user").column)} = %s '
+        f'AND {quote(meta.get_field(target).column)} = %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.id, target_id])
+        return cursor.rowcount > 0
@@ -0,0 +1,68 @@
+import re
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+UTF8 = ('utf-8', 'utf8')
+BIG_INT_RE = re.compile(rb'\d{20}')
+
+encoder_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson с тем же результатом, что и у DRF.
+
+    Даты, Decimal и ленивые строки преобразует кодировщик DRF. Отступы,
+    ensure_ascii и данные, которые orjson не принимает, отдаются
+    стандартному JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact or self.get_indent(
+                accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=encoder_default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser на orjson.
+
+    Тела с ошибками и с целыми больше 64 бит разбирает стандартный json,
+    чтобы результат и сообщения об ошибках не отличались от JSONParser.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower() not in UTF8:
+                body = body.decode(encoding).encode()
+            if not BIG_INT_RE.search(body):
+                try:
+                    return orjson.loads(body)
+                except orjson.JSONDecodeError:
+                    pass
+            return json.loads(body.decode())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
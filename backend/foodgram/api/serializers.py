@@ -11,6 +11,8 @@ from users.models import CustomUser, FollowUser
 from utils.static_params import LEN_200
 from utils.validators import validate_less_than_zero, validate_required
 
+from .fieldsets import SparseFieldsMixin
+
 
 class Base64ImageField(serializers.ImageField):
     """Метод для загрузки картинки через Base64."""
@@ -39,7 +41,7 @@ class CustomCreateUserSerializer(UserCreateSerializer):
         return obj
 
 
-class CustomUserListSerializer(UserSerializer):
+class CustomUserListSerializer(SparseFieldsMixin, UserSerializer):
     """Получение списка пользователей."""
     is_subscribed = serializers.SerializerMethodField()
 
@@ -51,11 +53,12 @@ class CustomUserListSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, author):
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         request = self.context.get('request')
-        user = request.user
         if request is None or request.user.is_anonymous:
             return False
-        return user.follower.filter(
+        return request.user.follower.filter(
             author=author
         ).exists()
 
@@ -135,6 +138,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
@@ -144,6 +149,8 @@ class RecipeSerializer(serializers.ModelSerializer):
                 ).exists())
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
@@ -291,7 +298,7 @@ class RecipeMiniSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class FollowListSerializer(serializers.ModelSerializer):
+class FollowListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """ Сериализатор списка подписок."""
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
@@ -352,3 +359,25 @@ class FollowSerializer(serializers.ModelSerializer):
             instance.author,
             context={'request': self.context.get('request')}
         ).data
+
+
+class PantrySearchSerializer(serializers.Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+    ids = serializers.CharField()
+    min_coverage = serializers.FloatField(
+        min_value=0, max_value=1, default=0
+    )
+    complete = serializers.BooleanField(default=False)
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(item) for item in value.split(',') if item.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id ингредиентов через запятую.'
+            )
+        if not ids:
+            raise serializers.ValidationError(
+                'Укажите хотя бы один ингредиент.'
+            )
+        return ids
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import Ingredient, Recipe, Tag
+
+from .caching import invalidate
+
+
+def invalidate_on_commit(*names):
+    transaction.on_commit(lambda: invalidate(*names))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    invalidate_on_commit('tags', 'recipes')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    invalidate_on_commit('ingredients', 'recipes')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipes(sender, **kwargs):
+    invalidate_on_commit('recipes')
@@ -0,0 +1,119 @@
+import json
+import os
+import random
+import re
+import time
+import traceback
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+INSTRUMENTATION_FILES = ('api/middleware.py', 'api/slow_queries.py')
+IN_LIST_RE = re.compile(r'\(%s(?:, %s)+\)')
+
+
+def redact_params(params):
+    """Оставляет от параметров запроса только их типы."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def fingerprint(sql):
+    """Нормализует SQL, чтобы группировать одинаковые запросы."""
+    return IN_LIST_RE.sub('(...)', ' '.join(sql.split()))
+
+
+def origin_frame():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if (not filename.startswith(base_dir)
+                or 'site-packages' in filename
+                or filename.endswith(INSTRUMENTATION_FILES)):
+            continue
+        return (f'{os.path.relpath(filename, base_dir)}:{frame.lineno} '
+                f'in {frame.name}')
+    return None
+
+
+def read_log(path=None):
+    """Читает записи о медленных запросах."""
+    path = path or settings.SLOW_QUERY['LOG_FILE']
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as log_file:
+        return [json.loads(line) for line in log_file if line.strip()]
+
+
+class SlowQueryRecorder:
+    """Обертка выполнения SQL, сохраняющая медленные запросы."""
+
+    def __init__(self, request=None):
+        options = settings.SLOW_QUERY
+        self.request = request
+        self.threshold = options['THRESHOLD_MS'] / 1000
+        self.explain_rate = options['EXPLAIN_SAMPLE_RATE']
+        self.log_file = options['LOG_FILE']
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        succeeded = False
+        try:
+            result = execute(sql, params, many, context)
+            succeeded = True
+            return result
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.record(
+                    sql, None if many else params, context['connection'],
+                    duration, explain=succeeded and not many
+                )
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else None
+
+    def explain(self, connection, sql, params):
+        if (connection.vendor != 'postgresql'
+                or not sql.lstrip().upper().startswith('SELECT')
+                or connection.needs_rollback
+                or random.random() >= self.explain_rate):
+            return None
+        self.explaining = True
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params
+                    )
+                    return '\n'.join(row[0] for row in cursor.fetchall())
+        except DatabaseError:
+            return None
+        finally:
+            self.explaining = False
+
+    def record(self, sql, params, connection, duration, explain):
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'database': connection.alias,
+            'duration_ms': round(duration * 1000, 2),
+            'sql': sql,
+            'params': redact_params(params),
+            'view': self.view_name(),
+            'origin': origin_frame(),
+            'plan': (
+                self.explain(connection, sql, params) if explain else None
+            ),
+        }
+        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        with open(self.log_file, 'a', encoding='utf-8') as log_file:
+            log_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
@@ -0,0 +1,77 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from rest_framework.authtoken.models import Token
+from users.models import CustomUser, FollowUser
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-default',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-throttle',
+    },
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecipeDataTestCase(TestCase):
+    """Пользователи, теги, ингредиенты и рецепты с избранным и корзиной."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f'user{number}@example.com', username=f'user{number}',
+                first_name=f'Имя{number}', last_name=f'Фамилия{number}',
+                password='password'
+            ) for number in range(3)
+        ]
+        cls.user = cls.users[0]
+        cls.token = Token.objects.create(user=cls.user)
+        FollowUser.objects.create(user=cls.user, author=cls.users[1])
+        cls.tags = [
+            Tag.objects.create(
+                name=name, slug=slug, color=color
+            ) for name, slug, color in (
+                ('Завтрак', 'breakfast', '#E26C2D'),
+                ('Обед', 'lunch', '#49B64E'),
+                ('Ужин', 'dinner', '#8775D2'),
+            )
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (
+                ('абрикос', 'г'), ('банан', 'шт.'), ('молоко', 'мл'),
+                ('мука', 'г'), ('яйца', 'шт.'),
+            )
+        ]
+        cls.recipes = []
+        for number in range(9):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {number}', text=f'Описание "{number}"\n',
+                cooking_time=number + 5,
+                author=cls.users[number % 3],
+                image=f'recipes/images/{number}.png' if number % 2 else None,
+            )
+            recipe.tags.set(cls.tags[:number % 3 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient,
+                    amount=(number + 1) * (position + 1)
+                ) for position, ingredient in enumerate(
+                    cls.ingredients[number % 2:number % 2 + 3]
+                )
+            )
+            cls.recipes.append(recipe)
+        for recipe in cls.recipes[::2]:
+            FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+        for recipe in cls.recipes[::3]:
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
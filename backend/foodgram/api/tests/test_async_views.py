@@ -0,0 +1,92 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import RequestFactory
+from django.urls import resolve
+
+from api.async_views import counterparts
+
+from .fixtures import RecipeDataTestCase
+
+
+class AsyncViewsTest(RecipeDataTestCase):
+    """Асинхронные представления отвечают так же, как ViewSet."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.views = counterparts()
+
+    def fetch(self, view, path, params, headers):
+        for cache in caches.all():
+            cache.clear()
+        request = RequestFactory().get(
+            path, params, HTTP_HOST='testserver', **headers
+        )
+        response = view(request, **resolve(path).kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response.status_code, response.content
+
+    def assertSameResponse(self, path, params=None, auth=False):
+        headers = {}
+        if auth:
+            key = self.token.key if auth is True else auth
+            headers['HTTP_AUTHORIZATION'] = f'Token {key}'
+        async_view, sync_view = self.views[resolve(path).url_name]
+        with self.subTest(path=path, params=params, auth=auth):
+            expected = self.fetch(sync_view, path, params, headers)
+            actual = self.fetch(
+                async_to_sync(async_view), path, params, headers
+            )
+            self.assertEqual(actual, expected)
+
+    def test_recipes(self):
+        for auth in (False, True):
+            for params in (
+                None,
+                {'page': 2},
+                {'limit': 4, 'page': 2},
+                {'page': 100},
+                {'tags': ['breakfast', 'dinner']},
+                {'author': self.users[1].id},
+                {'is_favorited': 1},
+                {'is_in_shopping_cart': 1},
+                {'ordering': 'popular'},
+                {'ordering': 'unknown'},
+                {'fields': 'id,name,is_favorited'},
+                {'omit': 'ingredients,author'},
+                {'fields': 'unknown'},
+            ):
+                self.assertSameResponse('/api/recipes/', params, auth)
+        self.assertSameResponse('/api/recipes/', auth='invalid')
+
+    def test_recipe(self):
+        for auth in (False, True):
+            for recipe in self.recipes[:3]:
+                self.assertSameResponse(f'/api/recipes/{recipe.id}/',
+                                        auth=auth)
+            self.assertSameResponse(
+                f'/api/recipes/{self.recipes[1].id}/',
+                {'fields': 'id,is_in_shopping_cart'}, auth
+            )
+            self.assertSameResponse('/api/recipes/0/', auth=auth)
+
+    def test_tags(self):
+        self.assertSameResponse('/api/tags/')
+        self.assertSameResponse(f'/api/tags/{self.tags[0].id}/')
+        self.assertSameResponse('/api/tags/0/')
+
+    def test_ingredients(self):
+        for params in (None, {'name': 'м'}, {'name': 'нет'}):
+            self.assertSameResponse('/api/ingredients/', params)
+        self.assertSameResponse(f'/api/ingredients/{self.ingredients[0].id}/')
+        self.assertSameResponse('/api/ingredients/0/')
+
+    def test_users(self):
+        for auth in (False, True):
+            for params in (None, {'limit': 2, 'page': 2},
+                           {'fields': 'id,is_subscribed'}):
+                self.assertSameResponse('/api/users/', params, auth)
+            self.assertSameResponse(f'/api/users/{self.users[1].id}/',
+                                    auth=auth)
+            self.assertSameResponse('/api/users/0/', auth=auth)
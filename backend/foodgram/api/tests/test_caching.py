@@ -0,0 +1,42 @@
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from api.caching import acached
+
+from .fixtures import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncCacheTest(SimpleTestCase):
+    """acached обращается к кэшу вне потока цикла событий."""
+
+    def record_threads(self, name):
+        original = getattr(cache, name)
+
+        def call(*args, **kwargs):
+            self.threads.append(threading.get_ident())
+            return original(*args, **kwargs)
+
+        patcher = mock.patch.object(cache, name, call)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cache_calls_leave_event_loop(self):
+        request = RequestFactory().get('/api/tags/', HTTP_HOST='testserver')
+        self.threads = []
+        for name in ('get', 'get_or_set', 'set'):
+            self.record_threads(name)
+
+        async def build():
+            build.thread = threading.get_ident()
+            return ['tag']
+
+        cached = async_to_sync(acached)
+        self.assertEqual(cached('tags', request, build), ['tag'])
+        self.assertEqual(cached('tags', request, build), ['tag'])
+        self.assertTrue(self.threads)
+        self.assertNotIn(build.thread, self.threads)
@@ -0,0 +1,140 @@
+import base64
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import override_settings
+from PIL import Image
+from recipes.models import Recipe
+
+from api.importer import RecipeImporter
+
+from .fixtures import RecipeDataTestCase
+
+
+def png():
+    content = BytesIO()
+    Image.new('RGB', (1, 1)).save(content, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        content.getvalue()
+    ).decode()
+
+
+class RecipeImporterImageTest(RecipeDataTestCase):
+    """Изображения загрузки сохраняются только для вставленных рецептов."""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media)
+
+    def record(self, **fields):
+        return {
+            'name': 'Загруженный', 'text': 'Описание', 'cooking_time': 10,
+            'tags': [self.tags[0].id],
+            'ingredients': [{'id': self.ingredients[0].id, 'amount': 5}],
+            **fields,
+        }
+
+    def files(self):
+        return [
+            name for _, _, names in os.walk(self.media) for name in names
+        ]
+
+    def run_importer(self, *records):
+        return RecipeImporter(self.user).run(enumerate(records, 1))
+
+    def test_saves_valid_image(self):
+        report = self.run_importer(self.record(image=png()))
+        self.assertEqual(report, {'created': 1, 'errors': []})
+        recipe = Recipe.objects.get(name='Загруженный')
+        self.assertEqual(self.files(), [os.path.basename(recipe.image.name)])
+
+    def test_invalid_record_keeps_no_image(self):
+        report = self.run_importer(self.record(image=png(), tags=[0]))
+        self.assertEqual(report['created'], 0)
+        self.assertEqual(self.files(), [])
+
+    def test_rejects_invalid_images(self):
+        not_image = 'data:image/png;base64,' + base64.b64encode(
+            b'not an image'
+        ).decode()
+        for image in (not_image, 'data:image/png;base64,???',
+                      'recipes/images/missing.png'):
+            with self.subTest(image=image):
+                report = self.run_importer(self.record(image=image))
+                self.assertEqual(report['created'], 0)
+                self.assertIn('image', report['errors'][0]['errors'])
+        self.assertEqual(self.files(), [])
+
+    def test_accepts_existing_file(self):
+        os.makedirs(os.path.join(self.media, 'recipes/images'))
+        with open(os.path.join(self.media, 'recipes/images/a.png'), 'w'):
+            pass
+        report = self.run_importer(
+            self.record(image='recipes/images/a.png')
+        )
+        self.assertEqual(report, {'created': 1, 'errors': []})
+
+    def test_failed_batch_deletes_images(self):
+        with mock.patch.object(
+            RecipeImporter, 'insert_rows', side_effect=IntegrityError
+        ):
+            with self.assertRaises(IntegrityError):
+                self.run_importer(self.record(image=png()))
+        self.assertEqual(self.files(), [])
+
+
+class RecipeImporterValidationTest(RecipeDataTestCase):
+    """Некорректные ссылки дают ошибку записи, а не прерывают загрузку."""
+
+    def record(self, match, **fields):
+        tag, ingredient = self.tags[0], self.ingredients[0]
+        if match == 'name':
+            tags = [{'slug': tag.slug}]
+            ingredients = [{
+                'name': ingredient.name,
+                'measurement_unit': ingredient.measurement_unit, 'amount': 5,
+            }]
+        else:
+            tags, ingredients = [tag.id], [{'id': ingredient.id, 'amount': 5}]
+        return {
+            'name': 'Загруженный', 'text': 'Описание', 'cooking_time': 10,
+            'tags': tags, 'ingredients': ingredients, **fields,
+        }
+
+    def test_unhashable_references(self):
+        for match, field, value in (
+            ('id', 'author', ['user0@example.com']),
+            ('id', 'author', {'email': {'a': 1}}),
+            ('id', 'tags', [[self.tags[0].id]]),
+            ('id', 'tags', [{'id': {'a': 1}}]),
+            ('id', 'ingredients', [{'id': [1], 'amount': 5}]),
+            ('name', 'tags', [{'slug': ['breakfast']}]),
+            ('name', 'ingredients',
+             [{'name': ['абрикос'], 'measurement_unit': 'г', 'amount': 5}]),
+        ):
+            with self.subTest(match=match, field=field, value=value):
+                report = RecipeImporter(self.user, match=match).run(
+                    enumerate([self.record(match, **{field: value}),
+                               self.record(match)], 1)
+                )
+                self.assertEqual(report['created'], 1)
+                self.assertEqual(len(report['errors']), 1)
+                self.assertIn(field, report['errors'][0]['errors'])
+
+    def test_empty_body(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post(
+            '/api/recipes/import/', b'',
+            content_type='application/x-ndjson',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        self.assertEqual(response.status_code, 400)
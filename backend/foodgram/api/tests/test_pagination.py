@@ -0,0 +1,30 @@
+from django.contrib.auth.models import AnonymousUser
+
+from api.pagination import count_key
+from api.projections import RECIPE_FIELDS, recipe_rows
+
+from .fixtures import RecipeDataTestCase
+
+
+class CountKeyTest(RecipeDataTestCase):
+    """Ключ кэша числа строк зависит только от условий выборки."""
+
+    def test_ignores_user_annotations_and_ordering(self):
+        keys = {
+            count_key(recipe_rows(user, fields=fields).order_by(*ordering))
+            for user in (AnonymousUser(), self.user, self.users[1])
+            for fields in (RECIPE_FIELDS, ('id', 'name'))
+            for ordering in ((), ('-popularity', '-id'))
+        }
+        self.assertEqual(len(keys), 1)
+
+    def test_depends_on_filters(self):
+        rows = recipe_rows(self.user, fields=RECIPE_FIELDS)
+        keys = {
+            count_key(rows),
+            count_key(rows.filter(author=self.users[1])),
+            count_key(rows.filter(author=self.users[2])),
+            count_key(rows.filter(favorite_recipe__user=self.user)),
+            count_key(rows.filter(favorite_recipe__user=self.users[1])),
+        }
+        self.assertEqual(len(keys), 5)
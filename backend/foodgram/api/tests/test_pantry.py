@@ -0,0 +1,43 @@
+from recipes.models import RecipeChange, RecipeIngredient
+from recipes.pantry import PantryIndex
+
+from .fixtures import RecipeDataTestCase
+
+
+class PantryJournalTest(RecipeDataTestCase):
+    """Индекс подбора по ингредиентам догоняет журнал изменений."""
+
+    def change_ingredients(self, recipe, ingredient):
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=1
+        )
+
+    def found(self, index, recipe, ingredient):
+        return recipe.id in index.search([ingredient.id], min_coverage=1)
+
+    def test_applies_changes(self):
+        index = PantryIndex()
+        recipe, ingredient = self.recipes[0], self.ingredients[4]
+        self.assertFalse(self.found(index, recipe, ingredient))
+        self.change_ingredients(recipe, ingredient)
+        RecipeChange.objects.create(recipe_id=recipe.id)
+        index.apply_changes()
+        self.assertTrue(self.found(index, recipe, ingredient))
+
+    def test_late_commit(self):
+        """Запись с меньшим номером, видимая позже, не пропускается."""
+        early, late = (
+            RecipeChange.objects.create(recipe_id=self.recipes[1].id),
+            RecipeChange.objects.create(recipe_id=self.recipes[2].id),
+        )
+        early_id = early.id
+        early.delete()
+        index = PantryIndex()
+        self.assertEqual(index.position[0], late.id)
+        recipe, ingredient = self.recipes[1], self.ingredients[0]
+        self.change_ingredients(recipe, ingredient)
+        RecipeChange.objects.create(id=early_id, recipe_id=recipe.id)
+        index.apply_changes()
+        self.assertTrue(self.found(index, recipe, ingredient))
+        self.assertIn(early_id, index.applied)
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from recipes.models import Recipe
+from rest_framework.renderers import JSONRenderer
+
+from api.projections import RECIPE_FIELDS, project_recipes, recipe_rows
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeSerializer
+
+from .fixtures import RecipeDataTestCase
+
+
+class ProjectionsTest(RecipeDataTestCase):
+    """Проекции из values() совпадают с RecipeSerializer байт в байт."""
+
+    renderer = JSONRenderer()
+
+    def request_for(self, user):
+        request = RequestFactory().get('/api/recipes/', HTTP_HOST='testserver')
+        request.user = user
+        return request
+
+    def serialized(self, request, recipes, fields=RECIPE_FIELDS):
+        data = RecipeSerializer(
+            recipes, many=True, context={'request': request}
+        ).data
+        return self.renderer.render([
+            {name: recipe[name] for name in fields} for recipe in data
+        ])
+
+    def projected(self, request, queryset, fields=RECIPE_FIELDS):
+        return self.renderer.render(project_recipes(
+            recipe_rows(request.user, queryset, fields), request, fields
+        ))
+
+    def test_recipes(self):
+        for user in (AnonymousUser(), self.user, self.users[1]):
+            request = self.request_for(user)
+            with self.subTest(user=user):
+                self.assertEqual(
+                    self.projected(request, Recipe.objects.all()),
+                    self.serialized(request, Recipe.objects.all())
+                )
+
+    def test_single_recipe(self):
+        request = self.request_for(self.user)
+        for recipe in self.recipes[:2]:
+            queryset = Recipe.objects.filter(id=recipe.id)
+            with self.subTest(recipe=recipe.id):
+                self.assertEqual(
+                    self.projected(request, queryset),
+                    self.serialized(request, queryset)
+                )
+
+    def test_sparse_fields(self):
+        request = self.request_for(self.user)
+        for fields in (('id', 'name'),
+                       ('author', 'is_favorited', 'image'),
+                       ('tags', 'ingredients', 'is_in_shopping_cart')):
+            with self.subTest(fields=fields):
+                self.assertEqual(
+                    self.projected(request, Recipe.objects.all(), fields),
+                    self.serialized(request, Recipe.objects.all(), fields)
+                )
+
+    def test_api_response(self):
+        response = self.client.get(
+            '/api/recipes/', {'limit': 100},
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        request = self.request_for(self.user)
+        expected = ORJSONRenderer().render({
+            'count': len(self.recipes),
+            'next': None,
+            'previous': None,
+            'results': RecipeSerializer(
+                Recipe.objects.all(), many=True, context={'request': request}
+            ).data,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected)
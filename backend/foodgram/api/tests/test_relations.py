@@ -0,0 +1,56 @@
+from recipes.models import FavoriteRecipe, ShoppingCart
+from users.models import FollowUser
+
+from .fixtures import RecipeDataTestCase
+
+
+class RelationsTest(RecipeDataTestCase):
+    """Повторное добавление и удаление избранного, корзины и подписок."""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+
+    def request(self, method, path):
+        return getattr(self.client, method)(path, **self.headers)
+
+    def assertToggles(self, name, model):
+        recipe = self.recipes[1]
+        path = f'/api/recipes/{recipe.id}/{name}/'
+        rows = model.objects.filter(user=self.user, recipe=recipe)
+        self.assertEqual(self.request('post', path).status_code, 201)
+        self.assertEqual(self.request('post', path).status_code, 400)
+        self.assertEqual(rows.count(), 1)
+        self.assertEqual(self.request('delete', path).status_code, 204)
+        self.assertEqual(self.request('delete', path).status_code, 400)
+        self.assertFalse(rows.exists())
+        for method in ('post', 'delete'):
+            with self.subTest(method=method):
+                self.assertEqual(
+                    self.request(method, f'/api/recipes/0/{name}/')
+                    .status_code, 404
+                )
+
+    def test_favorite(self):
+        self.assertToggles('favorite', FavoriteRecipe)
+
+    def test_shopping_cart(self):
+        self.assertToggles('shopping_cart', ShoppingCart)
+
+    def test_subscribe(self):
+        author = self.users[2]
+        path = f'/api/users/{author.id}/subscribe/'
+        rows = FollowUser.objects.filter(user=self.user, author=author)
+        self.assertEqual(self.request('post', path).status_code, 201)
+        self.assertEqual(self.request('post', path).status_code, 400)
+        self.assertEqual(rows.count(), 1)
+        self.assertEqual(self.request('delete', path).status_code, 204)
+        self.assertEqual(self.request('delete', path).status_code, 404)
+        self.assertFalse(rows.exists())
+        self.assertEqual(
+            self.request('post', f'/api/users/{self.user.id}/subscribe/')
+            .status_code, 400
+        )
+        self.assertEqual(
+            self.request('post', '/api/users/0/subscribe/').status_code, 404
+        )
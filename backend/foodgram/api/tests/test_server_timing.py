@@ -0,0 +1,46 @@
+import re
+import time
+from unittest import mock
+
+import orjson
+from django.test import override_settings
+
+from api import projections
+
+from .fixtures import RecipeDataTestCase
+
+SERVER_TIMING = {'ENABLED': True, 'SAMPLE_RATE': 1.0, 'SLOW_REQUEST_MS': 1e9}
+
+
+def slow(function, seconds=0.02):
+    def wrapper(*args, **kwargs):
+        time.sleep(seconds)
+        return function(*args, **kwargs)
+    return wrapper
+
+
+@override_settings(SERVER_TIMING=SERVER_TIMING)
+class ServerTimingTest(RecipeDataTestCase):
+    """Server-Timing учитывает проекции и рендеринг ответа."""
+
+    def timings(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return {
+            name: float(duration) for name, duration in re.findall(
+                r'(\w+);dur=([\d.]+)', response['Server-Timing']
+            )
+        }
+
+    def test_projection_counts_as_serializer(self):
+        with mock.patch.object(
+            projections, 'tags_by_recipe', slow(projections.tags_by_recipe)
+        ):
+            timings = self.timings('/api/recipes/')
+        self.assertGreaterEqual(timings['serializer'], 20)
+
+    def test_render_is_timed(self):
+        with mock.patch.object(orjson, 'dumps', slow(orjson.dumps)):
+            timings = self.timings('/api/recipes/')
+        self.assertGreaterEqual(timings['render'], 20)
+        self.assertLess(timings['serializer'], 20)
@@ -0,0 +1,29 @@
+from unittest import mock
+
+from api.pagination import CustomPaginator
+from api.throttling import PageSizeThrottle
+
+from .fixtures import RecipeDataTestCase
+
+
+class PageSizeThrottleTest(RecipeDataTestCase):
+    """Большие страницы ограничены и оплачиваются бюджетом."""
+
+    def get_recipes(self, limit):
+        return self.client.get('/api/recipes/', {'limit': limit})
+
+    def test_oversized_limit_is_capped(self):
+        with mock.patch.object(CustomPaginator, 'max_page_size', 2):
+            response = self.get_recipes(100000000)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_request_above_budget_is_rejected(self):
+        with mock.patch.dict(
+            PageSizeThrottle.THROTTLE_RATES, {'page_size': '5/min'}
+        ), mock.patch.object(CustomPaginator, 'max_page_size', 100):
+            response = self.get_recipes(100000000)
+            self.assertEqual(response.status_code, 429)
+            self.assertNotIn('Retry-After', response)
+            self.assertEqual(self.get_recipes(36).status_code, 200)
+            self.assertEqual(self.get_recipes(12).status_code, 429)
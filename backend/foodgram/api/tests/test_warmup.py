@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from api import warmup
+from api.throttling import AnonBrowsingThrottle
+
+from .fixtures import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReadinessTest(TestCase):
+    """/ready на пустой базе и повторные проверки готовности."""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        warmup._state.update(ready=False, attempted=None)
+        self.addCleanup(warmup._state.update, ready=False, attempted=None)
+
+    def test_ready_on_empty_database(self):
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ready'})
+
+    def test_warm_up_runs_once(self):
+        with mock.patch.object(
+            warmup, 'run_warm_up', return_value=True
+        ) as run:
+            for _ in range(3):
+                self.assertEqual(self.client.get('/ready').status_code, 200)
+        run.assert_called_once()
+
+    def test_failed_warm_up_is_not_repeated_on_every_probe(self):
+        with mock.patch.object(
+            warmup, 'run_warm_up', return_value=False
+        ) as run:
+            for _ in range(3):
+                self.assertEqual(self.client.get('/ready').status_code, 503)
+        run.assert_called_once()
+
+    def test_warm_up_is_not_throttled(self):
+        with mock.patch.dict(
+            AnonBrowsingThrottle.THROTTLE_RATES, {'anon': '1/min'}
+        ):
+            self.assertTrue(warmup.warm_up())
+            self.assertEqual(self.client.get('/api/tags/').status_code, 200)
+            self.assertEqual(self.client.get('/api/tags/').status_code, 429)
@@ -0,0 +1,94 @@
+from math import ceil
+
+from django.core.cache import caches
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle
+
+from .pagination import CustomPaginator
+from .warmup import WARM_UP_KEY
+
+
+def is_warm_up(request):
+    """Запрос прогрева воркера, который в ограничения не засчитывается."""
+    return bool(request.META.get(WARM_UP_KEY))
+
+
+class SharedCacheMixin:
+    """Счетчики в общем для всех воркеров кэше throttle."""
+
+    def __init__(self):
+        self.cache = caches['throttle']
+        super().__init__()
+
+    def allow_request(self, request, view):
+        return is_warm_up(request) or super().allow_request(request, view)
+
+
+class AnonBrowsingThrottle(SharedCacheMixin, AnonRateThrottle):
+    """Ограничение просмотра для анонимных пользователей по IP."""
+
+
+class CostRateThrottle(SharedCacheMixin, SimpleRateThrottle):
+    """Ограничение, в котором запрос расходует cost единиц бюджета.
+
+    Бюджет считается на пользователя, для анонимов - на IP. Запрос дороже
+    всего бюджета отклоняется всегда.
+    """
+
+    def get_cost(self, request, view):
+        return 1
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None or is_warm_up(request):
+            return True
+        self.cost = self.get_cost(request, view)
+        if self.cost <= 0:
+            return True
+        if self.cost > self.num_requests:
+            return self.throttle_failure()
+        self.key = self.get_cache_key(request, view)
+        self.history = self.cache.get(self.key, [])
+        self.now = self.timer()
+        while self.history and self.history[-1] <= self.now - self.duration:
+            self.history.pop()
+        if len(self.history) + self.cost > self.num_requests:
+            return self.throttle_failure()
+        self.history[:0] = [self.now] * self.cost
+        self.cache.set(self.key, self.history, self.duration)
+        return True
+
+    def wait(self):
+        if self.cost > self.num_requests:
+            return None
+        overflow = len(self.history) + self.cost - self.num_requests
+        return self.history[-overflow] + self.duration - self.now
+
+
+class PageSizeThrottle(CostRateThrottle):
+    """Страницы больше стандартной расходуют бюджет пропорционально размеру."""
+    scope = 'page_size'
+
+    def get_cost(self, request, view):
+        if getattr(view, 'detail', False):
+            return 0
+        page_size = CustomPaginator().get_page_size(request)
+        return ceil(page_size / CustomPaginator.page_size) - 1
+
+
+class ShoppingCartThrottle(CostRateThrottle):
+    """Ограничение выгрузок списка покупок."""
+    scope = 'shopping_cart'
+
+
+class IngredientSearchThrottle(CostRateThrottle):
+    """Ограничение поиска ингредиентов по названию."""
+    scope = 'ingredient_search'
+
+    def get_cost(self, request, view):
+        return 1 if request.query_params.get('name') else 0
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
@@ -10,7 +11,58 @@ router.register('tags', TagViewSet)
 router.register('recipes', RecipeViewSet)
 router.register('ingredients', IngredientViewSet)
 
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}
+
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
     path('', include(router.urls))
 ]
+
+if settings.JWT_AUTH:
+    from rest_framework_simplejwt.views import TokenBlacklistView
+
+    urlpatterns = [
+        path('auth/jwt/blacklist/', TokenBlacklistView.as_view(),
+             name='jwt-blacklist'),
+        path('auth/', include('djoser.urls.jwt')),
+    ] + urlpatterns
+
+if settings.ASYNC_API:
+    from . import async_views
+    from .async_views import read_only_async
+
+    urlpatterns = [
+        path('recipes/', read_only_async(
+            async_views.recipe_list, RecipeViewSet.as_view(LIST_ACTIONS)
+        ), name='recipe-list'),
+        path('recipes/<int:pk>/', read_only_async(
+            async_views.recipe_detail, RecipeViewSet.as_view(DETAIL_ACTIONS)
+        ), name='recipe-detail'),
+        path('tags/', read_only_async(
+            async_views.tag_list, TagViewSet.as_view(LIST_ACTIONS)
+        ), name='tag-list'),
+        path('tags/<int:pk>/', read_only_async(
+            async_views.tag_detail, TagViewSet.as_view(DETAIL_ACTIONS)
+        ), name='tag-detail'),
+        path('ingredients/', read_only_async(
+            async_views.ingredient_list,
+            IngredientViewSet.as_view(LIST_ACTIONS)
+        ), name='ingredient-list'),
+        path('ingredients/<int:pk>/', read_only_async(
+            async_views.ingredient_detail,
+            IngredientViewSet.as_view(DETAIL_ACTIONS)
+        ), name='ingredient-detail'),
+        path('users/', read_only_async(
+            async_views.user_list, CustomUserViewSet.as_view(LIST_ACTIONS)
+        ), name='customuser-list'),
+        path('users/<int:id>/', read_only_async(
+            async_views.user_detail,
+            CustomUserViewSet.as_view(DETAIL_ACTIONS)
+        ), name='customuser-detail'),
+    ] + urlpatterns
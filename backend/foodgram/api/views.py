@@ -1,30 +1,44 @@
 from django.conf import settings
 from django.db.models import Sum
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
                             RecipeIngredient, ShoppingCart, Tag)
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (AllowAny, IsAdminUser,
+                                        IsAuthenticated)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 from users.models import CustomUser, FollowUser
 
+from .caching import cached
+from .catalog import get_snapshot, snapshot_response
+from .export import aexport_recipes, export_recipes
+from .fieldsets import sparse_fields
 from .filters import IngredientFilterSet, RecipeFilter
+from .importer import RecipeImporter, read_records
 from .pagination import CustomPaginator
 from .permissions import IsAuthorOrReadOnly
+from .projections import RECIPE_FIELDS, project_recipes, recipe_rows
+from .queries import annotate_users
+from .relations import add_relation, remove_relation
 from .serializers import (
     FollowListSerializer,
-    FollowSerializer,
     OutIngredientSerializer,
+    PantrySearchSerializer,
     RecipeCreateSerializer,
     RecipeSerializer,
     TagSerializer,
     CustomUserListSerializer
 )
+from .throttling import (AnonBrowsingThrottle, IngredientSearchThrottle,
+                         PageSizeThrottle, ShoppingCartThrottle)
 
 
 class CustomUserViewSet(UserViewSet):
@@ -32,6 +46,16 @@ class CustomUserViewSet(UserViewSet):
     permission_classes = (AllowAny,)
     pagination_class = CustomPaginator
     serializer_class = CustomUserListSerializer
+    throttle_classes = (AnonBrowsingThrottle, PageSizeThrottle)
+
+    def get_queryset(self):
+        queryset = super().get_queryset().order_by('id')
+        if (self.action in ('list', 'retrieve', 'me')
+                and 'is_subscribed' not in sparse_fields(
+                    self.request.GET, CustomUserListSerializer.Meta.fields
+                )):
+            return queryset
+        return annotate_users(queryset, self.request.user)
 
     @action(['GET'], detail=False,
             permission_classes=(IsAuthenticated,))
@@ -56,23 +80,35 @@ class CustomUserViewSet(UserViewSet):
             permission_classes=(IsAuthenticated,))
     def subscribe(self, request, id):
         """Подписаться/отписаться."""
-        author = get_object_or_404(CustomUser, id=id)
-        if request.method == 'POST':
-            user = self.request.user
-            data = {'author': author.id, 'user': user.id}
-            serializer = FollowSerializer(
-                data=data, context={'request': request}
+        try:
+            author_id = int(id)
+        except ValueError:
+            raise Http404
+        if request.method == 'DELETE':
+            if not remove_relation(
+                FollowUser, request.user, 'author', author_id
+            ):
+                raise Http404
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        author = get_object_or_404(CustomUser, id=author_id)
+        if author_id == request.user.id:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Нельзя подписаться на себя.'
+                ]}
             )
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(data=serializer.data,
-                            status=status.HTTP_201_CREATED)
-
-        subscription = get_object_or_404(
-            FollowUser, user=request.user, author=author
+        if not add_relation(FollowUser, request.user, 'author', author_id):
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже подписаны на этого пользователя.'
+                ]}
+            )
+        return Response(
+            data=FollowListSerializer(
+                author, context={'request': request}
+            ).data,
+            status=status.HTTP_201_CREATED
         )
-        self.perform_destroy(subscription)
-        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class TagViewSet(ModelViewSet):
@@ -82,6 +118,13 @@ class TagViewSet(ModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        parent = super()
+        return Response(cached(
+            'tags', request,
+            lambda: parent.list(request, *args, **kwargs).data
+        ))
+
 
 class RecipeViewSet(ModelViewSet):
     """ViewSet рецептов."""
@@ -90,79 +133,176 @@ class RecipeViewSet(ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsAuthorOrReadOnly,)
+    throttle_classes = (AnonBrowsingThrottle, PageSizeThrottle)
+
+    def get_recipe_fields(self):
+        return sparse_fields(self.request.GET, RECIPE_FIELDS)
+
+    def get_queryset(self):
+        if self.action in ('retrieve', 'list'):
+            return recipe_rows(
+                self.request.user, fields=self.get_recipe_fields()
+            )
+        return super().get_queryset()
+
+    def recipe_page(self):
+        fields = self.get_recipe_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            project_recipes(page, self.request, fields)
+        ).data
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return Response(self.recipe_page())
+        return Response(cached('recipes', request, self.recipe_page))
+
+    def retrieve(self, request, *args, **kwargs):
+        fields = self.get_recipe_fields()
+        row = get_object_or_404(
+            self.filter_queryset(self.get_queryset()), pk=kwargs['pk']
+        )
+        return Response(project_recipes([row], request, fields)[0])
 
     def get_serializer_class(self):
         if self.action in ('retrieve', 'list'):
             return RecipeSerializer
         return RecipeCreateSerializer
 
-    @action(methods=['POST', 'DELETE'], detail=True,
-            permission_classes=(IsAuthenticated,))
-    def favorite(self, request, pk=None):
-        """Добавление/удаление избранного рецепта."""
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
-        favorite = FavoriteRecipe.objects.filter(user=user, recipe=recipe)
+    def toggle(self, request, pk, model, messages):
+        """Добавление/удаление рецепта в списке пользователя.
+
+        Успешное добавление или удаление - один запрос к БД. Рецепт
+        ищется отдельно, только чтобы отличить 404 от повторного запроса.
+        """
+        try:
+            recipe_id = int(pk)
+        except ValueError:
+            raise Http404
         if request.method == 'DELETE':
-            if favorite.exists():
-                favorite.delete()
+            if remove_relation(model, request.user, 'recipe', recipe_id):
                 return Response(
-                    {'message': 'Рецепт удален из избранного'},
+                    {'message': messages['removed']},
                     status=status.HTTP_204_NO_CONTENT
                 )
-            else:
-                return Response(
-                    {'message': 'Такого рецепта нет в избранном'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        else:
-            favorite, created = FavoriteRecipe.objects.get_or_create(
-                user=user, recipe=recipe
+            get_object_or_404(Recipe, id=recipe_id)
+            return Response(
+                {'message': messages['missing']},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            if created is False:
-                return Response(
-                    {'message': 'Рецепт уже в избранном'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            else:
-                return Response(
-                    {'message': 'Рецепт добавлен в избранное'},
-                    status=status.HTTP_201_CREATED
-                )
+        if add_relation(model, request.user, 'recipe', recipe_id):
+            return Response(
+                {'message': messages['added']},
+                status=status.HTTP_201_CREATED
+            )
+        get_object_or_404(Recipe, id=recipe_id)
+        return Response(
+            {'message': messages['exists']},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(methods=['POST', 'DELETE'], detail=True,
+            permission_classes=(IsAuthenticated,))
+    def favorite(self, request, pk=None):
+        """Добавление/удаление избранного рецепта."""
+        return self.toggle(request, pk, FavoriteRecipe, {
+            'added': 'Рецепт добавлен в избранное',
+            'exists': 'Рецепт уже в избранном',
+            'removed': 'Рецепт удален из избранного',
+            'missing': 'Такого рецепта нет в избранном',
+        })
 
     @action(methods=['POST', 'DELETE'], detail=True,
             permission_classes=(IsAuthenticated,))
     def shopping_cart(self, request, pk=None):
         """Добавление/удаление рецепта в корзине."""
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
-        cart = ShoppingCart.objects.filter(user=user, recipe=recipe)
-        if request.method == 'DELETE':
-            if cart.exists():
-                cart.delete()
-                return Response(
-                    {'message': 'Рецепт удален из корзины'},
-                    status=status.HTTP_204_NO_CONTENT
-                )
-            else:
-                return Response(
-                    {'message': 'Такого рецепта нет в корзине'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        else:
-            cart, created = ShoppingCart.objects.get_or_create(
-                user=user, recipe=recipe
+        return self.toggle(request, pk, ShoppingCart, {
+            'added': 'Рецепт добавлен в корзину',
+            'exists': 'Рецепт уже в корзине',
+            'removed': 'Рецепт удален из корзины',
+            'missing': 'Такого рецепта нет в корзине',
+        })
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Рецепты с похожим набором ингредиентов."""
+        from recipes.similarity import get_index
+
+        get_object_or_404(Recipe, id=pk)
+        index = get_index()
+        limit = min(
+            CustomPaginator().get_page_size(request),
+            settings.SIMILARITY['TOP_K']
+        )
+        ids = [
+            recipe_id for recipe_id, score in index.similar(int(pk), limit)
+        ] if index else []
+        fields = self.get_recipe_fields()
+        rows = {
+            row['id']: row for row in recipe_rows(
+                request.user, fields=fields
+            ).filter(id__in=ids)
+        }
+        return Response(project_recipes(
+            [rows[recipe_id] for recipe_id in ids if recipe_id in rows],
+            request, fields
+        ))
+
+    @action(detail=False)
+    def by_ingredients(self, request):
+        """Рецепты, которые можно приготовить из имеющихся ингредиентов."""
+        from recipes.pantry import get_pantry_index
+
+        params = PantrySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ids = get_pantry_index().search(
+            params.validated_data['ids'],
+            1 if params.validated_data['complete']
+            else params.validated_data['min_coverage']
+        )
+        fields = self.get_recipe_fields()
+        page = self.paginate_queryset(ids)
+        rows = {
+            row['id']: row for row in recipe_rows(
+                request.user, fields=fields
+            ).filter(id__in=page)
+        }
+        return self.get_paginated_response(project_recipes(
+            [rows[recipe_id] for recipe_id in page if recipe_id in rows],
+            request, fields
+        ))
+
+    @action(detail=False, permission_classes=(IsAdminUser,))
+    def export(self, request):
+        """Выгрузка всех рецептов в NDJSON для администраторов."""
+        export = aexport_recipes if settings.ASYNC_API else export_recipes
+        response = StreamingHttpResponse(
+            export(settings.EXPORT_CHUNK_SIZE),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename=recipes.ndjson'
+        )
+        return response
+
+    @action(methods=['POST'], detail=False, url_path='import',
+            permission_classes=(IsAdminUser,))
+    def import_recipes(self, request):
+        """Массовая загрузка рецептов из NDJSON или JSON-массива."""
+        match = request.query_params.get('match', 'id')
+        if match not in ('id', 'name'):
+            raise ValidationError(
+                {'match': ['Допустимые значения: id, name.']}
             )
-            if created is False:
-                return Response(
-                    {'message': 'Рецепт уже в корзине'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            else:
-                return Response(
-                    {'message': 'Рецепт добавлен в корзину'},
-                    status=status.HTTP_201_CREATED
-                )
+        if request.stream is None:
+            raise ValidationError(
+                {'non_field_errors': ['Пустое тело запроса.']}
+            )
+        importer = RecipeImporter(
+            request.user, settings.IMPORT_BATCH_SIZE, match
+        )
+        return Response(importer.run(read_records(request.stream)))
 
     def convert_txt(self, shop_list):
         file_name = settings.SHOPPING_CART_FILE
@@ -181,7 +321,8 @@ class RecipeViewSet(ModelViewSet):
 
     @action(
         detail=False,
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        throttle_classes=(ShoppingCartThrottle,)
     )
     def download_shopping_cart(self, request):
         """Скачивание ингредиентов из корзины."""
@@ -202,3 +343,28 @@ class IngredientViewSet(ModelViewSet):
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilterSet
+    throttle_classes = (AnonBrowsingThrottle, IngredientSearchThrottle)
+
+    def list(self, request, *args, **kwargs):
+        parent = super()
+        return Response(cached(
+            'ingredients', request,
+            lambda: parent.list(request, *args, **kwargs).data
+        ))
+
+    @action(detail=False)
+    def catalog(self, request):
+        """Ссылка на текущую версию снимка каталога ингредиентов."""
+        response = redirect(
+            'ingredient-catalog-version', version=get_snapshot()['version']
+        )
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    @action(detail=False, url_path=r'catalog/(?P<version>[0-9a-f]+)')
+    def catalog_version(self, request, version):
+        """Снимок каталога, который никогда не меняется по этому адресу."""
+        snapshot = get_snapshot()
+        if version != snapshot['version']:
+            return self.catalog(request)
+        return snapshot_response(request, snapshot)
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import reverse
+
+logger = logging.getLogger('foodgram.warmup')
+
+# (маршрут, параметры, необязательная страница). Второй страницы нет,
+# пока рецептов не больше одной страницы, и 404 для нее - тоже прогрев.
+WARM_UP_URLS = (
+    ('tag-list', '', False),
+    ('ingredient-list', '', False),
+    ('recipe-list', '', False),
+    ('recipe-list', '?page=2', True),
+)
+# Ключ WSGI environ с точкой не приходит из HTTP-заголовков, поэтому
+# отметить им запрос может только сам процесс.
+WARM_UP_KEY = 'foodgram.warm_up'
+RETRY_SECONDS = 30
+
+_lock = threading.Lock()
+_state = {'ready': False, 'attempted': None}
+
+
+def warm_up_host():
+    """Хост из ALLOWED_HOSTS, с которым запрос пройдет проверку."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def run_warm_up():
+    from django.test import Client
+
+    client = Client(HTTP_HOST=warm_up_host(), **{WARM_UP_KEY: True})
+    try:
+        for url_name, query, optional in WARM_UP_URLS:
+            response = client.get(reverse(url_name) + query)
+            if response.status_code == 404 and optional:
+                continue
+            if response.status_code != 200:
+                logger.warning(
+                    'Warm-up of %s returned %s',
+                    url_name, response.status_code
+                )
+                return False
+    except Exception:
+        logger.exception('Warm-up failed')
+        return False
+    return True
+
+
+def warm_up():
+    """Прогревает маршруты, представления и кэши до приема запросов.
+
+    Прогрев выполняется один раз за жизнь процесса, дальше возвращается
+    запомненный результат. Неудачный прогрев повторяется не чаще раза в
+    RETRY_SECONDS секунд.
+    """
+    with _lock:
+        attempted = _state['attempted']
+        if _state['ready'] or (
+            attempted is not None
+            and time.monotonic() - attempted < RETRY_SECONDS
+        ):
+            return _state['ready']
+        _state['attempted'] = time.monotonic()
+        _state['ready'] = run_warm_up()
+        return _state['ready']
+
+
+def readiness_view(request):
+    """Готовность воркера принимать трафик."""
+    if warm_up():
+        return JsonResponse({'status': 'ready'})
+    return JsonResponse({'status': 'warming up'}, status=503)
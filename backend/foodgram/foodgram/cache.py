@@ -0,0 +1,203 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, '
+    'expires REAL, accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+
+class SharedMemoryCache(BaseCache):
+    """Кэш в файле SQLite на tmpfs (/dev/shm), общий для всех воркеров.
+
+    Блокировки между процессами обеспечивает SQLite. Записи вытесняются
+    по давности последнего чтения, когда их больше MAX_ENTRIES или они
+    занимают больше MAX_SIZE байт. Время чтения обновляется не чаще раза
+    в TOUCH_INTERVAL секунд, чтобы чтения почти не брали блокировку записи.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.max_size = int(options.get('MAX_SIZE', 32 * 1024 * 1024))
+        self.touch_interval = float(options.get('TOUCH_INTERVAL', 1))
+        self.lock_timeout = float(options.get('LOCK_TIMEOUT', 5))
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        """Соединение потока; после fork воркер открывает свое."""
+        if getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=self.lock_timeout, isolation_level=None,
+                check_same_thread=False
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def _select(self, keys):
+        connection = self.connection
+        placeholders = ','.join('?' * len(keys))
+        rows = connection.execute(
+            'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})', keys
+        ).fetchall()
+        now = time.time()
+        found, expired, touched = {}, [], []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed >= self.touch_interval:
+                touched.append(key)
+        if expired:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN '
+                f'({",".join("?" * len(expired))}) AND expires <= ?',
+                expired + [now]
+            )
+        if touched:
+            connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key IN '
+                f'({",".join("?" * len(touched))})', [now] + touched
+            )
+        return found
+
+    def _write(self, key, value, timeout, replace):
+        expires = self.get_backend_timeout(timeout)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if not replace:
+                connection.execute(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    (key, now)
+                )
+            inserted = connection.execute(
+                f'INSERT OR {"REPLACE" if replace else "IGNORE"} INTO cache '
+                '(key, value, size, expires, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, data, len(key) + len(data), expires, now)
+            ).rowcount
+            self._cull(connection, now)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return bool(inserted)
+
+    def _cull(self, connection, now):
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (now,)
+        )
+        count, size = connection.execute(
+            'SELECT count(*), total(size) FROM cache'
+        ).fetchone()
+        if count <= self._max_entries and size <= self.max_size:
+            return
+        evict = max(count - self._max_entries, 0)
+        if self._cull_frequency:
+            evict = max(evict, count // self._cull_frequency)
+        excess = size - self.max_size
+        keys = []
+        for key, entry_size in connection.execute(
+            'SELECT key, size FROM cache ORDER BY accessed'
+        ):
+            if len(keys) >= evict and excess <= 0:
+                break
+            keys.append(key)
+            excess -= entry_size
+        connection.executemany(
+            'DELETE FROM cache WHERE key = ?', ((key,) for key in keys)
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write(key, value, timeout, replace=False)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._select([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {
+            self.make_and_validate_key(key, version=version): key
+            for key in keys
+        }
+        if not keys:
+            return {}
+        return {
+            keys[key]: value
+            for key, value in self._select(list(keys)).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(key, value, timeout, replace=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        ).rowcount)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self.connection.execute(
+            'DELETE FROM cache WHERE key = ?', (key,)
+        ).rowcount)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)', (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (data, len(key) + len(data), key)
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return value
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
@@ -0,0 +1,33 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+class ReplicaRouter:
+    """Чтение с реплики в безопасных запросах к API, запись - в основную БД.
+
+    После первой записи в рамках запроса все последующие чтения тоже идут
+    в основную БД, чтобы пользователь видел свои изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (use_replica.get()
+                and REPLICA in settings.DATABASES
+                and not connections['default'].in_atomic_block):
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        use_replica.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+from datetime import timedelta
 from pathlib import Path
 
 from dotenv import find_dotenv, load_dotenv
@@ -50,11 +51,17 @@ INSTALLED_APPS = [
     'recipes',
     'colorfield',
     'users',
+    'jobs',
 ]
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
 MIDDLEWARE = [
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.SlowQueryMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +69,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -84,11 +92,15 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASYNC_API = os.getenv('ASYNC_API', 'False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
 
+DB_POOLER_MODE = os.getenv('DB_POOLER_MODE', 'False') == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -97,9 +109,33 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # С ASYNC_API каждый поток sync_to_async держит свое соединение,
+        # и постоянные соединения копились бы до max_connections.
+        'CONN_MAX_AGE': (
+            0 if ASYNC_API else int(os.getenv('DB_CONN_MAX_AGE', '60'))
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        # Пулер в режиме транзакций не сохраняет курсоры и настройки сессии
+        # между транзакциями, поэтому часовой пояс задается на сервере.
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER_MODE,
     }
 }
 
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -157,10 +193,72 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
 
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.AnonBrowsingThrottle'],
+    # Адрес клиента для ограничений берется из X-Forwarded-For,
+    # который выставляет nginx перед приложением.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.getenv('THROTTLE_ANON_RATE', '120/min'),
+        'page_size': os.getenv('THROTTLE_PAGE_SIZE_RATE', '100/min'),
+        'shopping_cart': os.getenv('THROTTLE_SHOPPING_CART_RATE', '10/hour'),
+        'ingredient_search': os.getenv(
+            'THROTTLE_INGREDIENT_SEARCH_RATE', '300/min'
+        ),
+    },
+}
+
+CACHE_BACKENDS = {
+    'shared': {
+        'BACKEND': 'foodgram.cache.SharedMemoryCache',
+        'LOCATION': os.getenv(
+            'SHARED_CACHE_PATH', '/dev/shm/foodgram_cache.sqlite3'
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', 5000)),
+            'MAX_SIZE': int(
+                os.getenv('SHARED_CACHE_MAX_SIZE_MB', 32)
+            ) * 1024 * 1024,
+        },
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
 
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'shared')],
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'THROTTLE_CACHE_DIR', '/tmp/foodgram_throttle'
+        ),
+        # По умолчанию после 300 файлов кэш удаляет случайную треть
+        # счетчиков, и ограничения клиентов незаметно сбрасываются.
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.getenv('THROTTLE_CACHE_MAX_ENTRIES', '100000')
+            ),
+        },
+    },
+}
+
+API_CACHE_TIMEOUTS = {
+    'tags': int(os.getenv('API_CACHE_CATALOG_TIMEOUT', 3600)),
+    'ingredients': int(os.getenv('API_CACHE_CATALOG_TIMEOUT', 3600)),
+    'recipes': int(os.getenv('API_CACHE_RECIPES_TIMEOUT', 60)),
 }
 
 DJOSER = {
@@ -178,4 +276,146 @@ DJOSER = {
     },
 }
 
+JWT_AUTH = os.getenv('JWT_AUTH', 'False') == 'True'
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '5'))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', '7'))
+    ),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_OBTAIN_SERIALIZER': (
+        'api.authentication.CustomTokenObtainPairSerializer'
+    ),
+}
+
+if JWT_AUTH:
+    INSTALLED_APPS.append('rest_framework_simplejwt.token_blacklist')
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'].insert(
+        0, 'api.authentication.StatelessJWTAuthentication'
+    )
+
 CSRF_TRUSTED_ORIGINS = ['https://158.160.72.45', 'https://127.0.0.1', 'https://localhost', 'https://foodgram-tortegg.servebeer.com']
+
+SERVER_TIMING = {
+    'ENABLED': os.getenv('SERVER_TIMING_ENABLED', 'False') == 'True',
+    'SAMPLE_RATE': float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '1.0')),
+    'SLOW_REQUEST_MS': float(os.getenv('SERVER_TIMING_SLOW_MS', '500')),
+}
+
+RECIPE_SCORES = {
+    'FAVORITE_WEIGHT': float(os.getenv('RECIPE_SCORE_FAVORITE_WEIGHT', '1')),
+    'SHOPPING_CART_WEIGHT': float(
+        os.getenv('RECIPE_SCORE_SHOPPING_CART_WEIGHT', '1')
+    ),
+    'TRENDING_HALF_LIFE_HOURS': float(
+        os.getenv('RECIPE_SCORE_TRENDING_HALF_LIFE_HOURS', '72')
+    ),
+    'TRENDING_WINDOW_DAYS': int(
+        os.getenv('RECIPE_SCORE_TRENDING_WINDOW_DAYS', '30')
+    ),
+}
+
+RECIPE_CHANGES_RETENTION_DAYS = int(
+    os.getenv('RECIPE_CHANGES_RETENTION_DAYS', '7')
+)
+
+RECIPE_CHANGES_COMMIT_LAG_SECONDS = int(
+    os.getenv('RECIPE_CHANGES_COMMIT_LAG_SECONDS', '300')
+)
+
+SIMILARITY = {
+    'INDEX_DIR': os.getenv(
+        'SIMILARITY_INDEX_DIR', str(BASE_DIR / 'var' / 'similarity')
+    ),
+    'TOP_K': int(os.getenv('SIMILARITY_TOP_K', '20')),
+    'METRIC': os.getenv('SIMILARITY_METRIC', 'cosine'),
+    'BATCH_SIZE': int(os.getenv('SIMILARITY_BATCH_SIZE', '512')),
+}
+
+COMPRESSION = {
+    'ENABLED': os.getenv('COMPRESSION_ENABLED', 'True') == 'True',
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', '1024')),
+    'BROTLI_LEVEL': int(os.getenv('COMPRESSION_BROTLI_LEVEL', '4')),
+    'GZIP_LEVEL': int(os.getenv('COMPRESSION_GZIP_LEVEL', '6')),
+    # Только данные API: HTML-страницы с CSRF-токенами не сжимаются,
+    # чтобы исключить атаки по длине сжатого ответа (BREACH).
+    'CONTENT_TYPES': ('application/json', 'application/x-ndjson'),
+}
+
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '100'))
+
+PAGINATION_COUNT = {
+    'MODE': os.getenv('PAGINATION_COUNT_MODE', 'exact'),
+    'TIMEOUT': int(os.getenv('PAGINATION_COUNT_TIMEOUT', '30')),
+    'ESTIMATE_THRESHOLD': int(
+        os.getenv('PAGINATION_COUNT_ESTIMATE_THRESHOLD', '10000')
+    ),
+}
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+
+JOBS = {
+    'THREADS': int(os.getenv('JOBS_THREADS', '4')),
+    'POLL_INTERVAL': float(os.getenv('JOBS_POLL_INTERVAL', '1')),
+    'RETRY_DELAY': float(os.getenv('JOBS_RETRY_DELAY_SECONDS', '30')),
+    'HEARTBEAT_INTERVAL': float(
+        os.getenv('JOBS_HEARTBEAT_INTERVAL_SECONDS', '30')
+    ),
+    'STALE_AFTER': int(os.getenv('JOBS_STALE_AFTER_SECONDS', '300')),
+    'KEEP_DAYS': int(os.getenv('JOBS_KEEP_DAYS', '7')),
+    'SCHEDULE': {
+        'recipe_scores': {
+            'task': 'recipes.tasks.recompute_recipe_scores',
+            'every': int(os.getenv('JOBS_RECIPE_SCORES_EVERY', '900')),
+        },
+        'similarity_index': {
+            'task': 'recipes.tasks.build_similarity_index',
+            'every': int(os.getenv('JOBS_SIMILARITY_INDEX_EVERY', '3600')),
+        },
+        'prune_jobs': {
+            'task': 'jobs.tasks.prune_jobs',
+            'every': 24 * 60 * 60,
+        },
+    },
+}
+
+PROFILING = {
+    'ENABLED': os.getenv('PROFILING_ENABLED', 'False') == 'True',
+    'DIR': os.getenv('PROFILING_DIR', str(BASE_DIR / 'var' / 'profiles')),
+    'KEEP': int(os.getenv('PROFILING_KEEP', '100')),
+}
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+
+SLOW_QUERY = {
+    'ENABLED': os.getenv('SLOW_QUERY_ENABLED', 'False') == 'True',
+    'THRESHOLD_MS': float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200')),
+    'EXPLAIN_SAMPLE_RATE': float(
+        os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.1')
+    ),
+    'LOG_FILE': os.getenv(
+        'SLOW_QUERY_LOG_FILE', str(BASE_DIR / 'logs' / 'slow_queries.jsonl')
+    ),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram': {
+            'handlers': ['console'],
+            'level': os.getenv('FOODGRAM_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
@@ -14,12 +14,28 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from api.warmup import readiness_view
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
 urlpatterns = [
+    path('ready', readiness_view, name='ready'),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.METRICS_ENABLED:
+    from api.metrics import metrics_view
+
+    urlpatterns.append(path('metrics', metrics_view, name='metrics'))
+
+if settings.PROFILING['ENABLED']:
+    from api.profiling import profile_file_view, profiles_view
+
+    urlpatterns = [
+        path('admin/profiles/', profiles_view, name='profiles'),
+        path('admin/profiles/<str:name>/<str:file_name>', profile_file_view,
+             name='profile-file'),
+    ] + urlpatterns
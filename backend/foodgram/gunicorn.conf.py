@@ -0,0 +1,50 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = '0.0.0.0:8000'
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1
+))
+preload_app = True
+
+# Файлы метрик воркеров пишутся во временный каталог, а не в рабочий.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(
+    tempfile.gettempdir(), 'foodgram-prometheus'
+))
+
+if os.getenv('ASYNC_API', 'False') == 'True':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+
+
+def on_starting(server):
+    """Очищает каталог метрик от прошлых запусков."""
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def pre_fork(server, worker):
+    """Не передает воркерам соединения с БД, открытые при загрузке."""
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    """Прогрев воркера до того, как он начнет принимать запросы."""
+    from api.warmup import warm_up
+
+    warm_up()
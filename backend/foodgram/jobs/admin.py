@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'task',
+        'status',
+        'priority',
+        'run_at',
+        'attempts',
+        'finished',
+    )
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'last_error']
@@ -0,0 +1,34 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOBS['THREADS']
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOBS['POLL_INTERVAL'],
+            help='seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='exit once there are no jobs ready to run'
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(options['threads'], options['poll_interval'])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+        self.stdout.write(
+            f"Worker started with {options['threads']} threads."
+        )
+        worker.run(once=options['once'])
+        self.stdout.write('Worker stopped.')
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.3 on 2026-10-19 09:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=200, verbose_name='Задача')),
+                ('kwargs', models.JSONField(default=dict, verbose_name='Аргументы')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Статус')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='Приоритет')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Запустить после')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Максимум попыток')),
+                ('schedule', models.CharField(blank=True, default='', max_length=200, verbose_name='Расписание')),
+                ('last_error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('started', models.DateTimeField(null=True, verbose_name='Запущена')),
+                ('finished', models.DateTimeField(null=True, verbose_name='Завершена')),
+            ],
+            options={
+                'verbose_name': 'Задача',
+                'verbose_name_plural': 'Задачи',
+                'ordering': ('-id',),
+                'indexes': [models.Index(condition=models.Q(('status', 'queued')), fields=['-priority', 'run_at', 'id'], name='job_queue_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('queued', 'running')), models.Q(('schedule', ''), _negated=True)), fields=('schedule',), name='job_schedule_unique'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(verbose_name='Задача', max_length=200)
+    kwargs = models.JSONField(verbose_name='Аргументы', default=dict)
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    priority = models.SmallIntegerField(verbose_name='Приоритет', default=0)
+    run_at = models.DateTimeField(
+        verbose_name='Запустить после',
+        default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+        default=3
+    )
+    schedule = models.CharField(
+        verbose_name='Расписание',
+        max_length=200,
+        blank=True,
+        default=''
+    )
+    last_error = models.TextField(verbose_name='Ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True
+    )
+    started = models.DateTimeField(verbose_name='Запущена', null=True)
+    heartbeat = models.DateTimeField(
+        verbose_name='Последняя отметка воркера',
+        null=True
+    )
+    finished = models.DateTimeField(verbose_name='Завершена', null=True)
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                condition=models.Q(status='queued'),
+                name='job_queue_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['schedule'],
+                condition=(
+                    models.Q(status__in=('queued', 'running'))
+                    & ~models.Q(schedule='')
+                ),
+                name='job_schedule_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task} ({self.get_status_display()})'
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+
+def task(name=None, max_attempts=3):
+    """Регистрирует функцию как задачу, которую может выполнить воркер."""
+
+    def decorator(function):
+        function.task_name = name or (
+            f'{function.__module__}.{function.__name__}'
+        )
+        function.max_attempts = max_attempts
+        TASKS[function.task_name] = function
+        return function
+
+    return decorator
+
+
+def task_max_attempts(task_name):
+    """Число попыток зарегистрированной задачи или значение по умолчанию."""
+    function = TASKS.get(task_name)
+    if function is None:
+        return Job._meta.get_field('max_attempts').default
+    return function.max_attempts
+
+
+def enqueue(function, priority=0, run_at=None, **kwargs):
+    """Ставит задачу в очередь; kwargs должны сериализоваться в JSON.
+
+    Внутри транзакции задача появится в очереди только вместе с ней.
+    """
+    return Job.objects.create(
+        task=function.task_name,
+        kwargs=kwargs,
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=function.max_attempts,
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повтором."""
+    return timedelta(
+        seconds=settings.JOBS['RETRY_DELAY'] * 2 ** (attempts - 1)
+    )
+
+
+def schedule(names=None):
+    """Ставит в очередь периодические задачи, которых там еще нет."""
+    entries = settings.JOBS['SCHEDULE']
+    now = timezone.now()
+    Job.objects.bulk_create([
+        Job(
+            task=entries[name]['task'],
+            schedule=name,
+            priority=entries[name].get('priority', 0),
+            max_attempts=task_max_attempts(entries[name]['task']),
+            run_at=now + timedelta(
+                seconds=entries[name]['every'] if names else 0
+            ),
+        )
+        for name in (names or entries) if name in entries
+    ], ignore_conflicts=True)
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import task
+
+
+@task()
+def prune_jobs():
+    """Удаляет завершенные задачи старше JOBS['KEEP_DAYS'] дней."""
+    Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED),
+        finished__lt=timezone.now() - timedelta(
+            days=settings.JOBS['KEEP_DAYS']
+        )
+    ).delete()
@@ -0,0 +1,186 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import (TestCase, TransactionTestCase, override_settings,
+                         skipUnlessDBFeature)
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue, schedule, task
+from jobs.worker import claim, execute, finish, heartbeat, requeue_stale
+
+calls = []
+
+
+@task(name='tests.record', max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('boom')
+
+
+def make_job(**fields):
+    return Job.objects.create(**{'task': 'tests.record', **fields})
+
+
+class ClaimTest(TestCase):
+    """Порядок и ограничения выборки задач из очереди."""
+
+    def test_order_and_limit(self):
+        now = timezone.now()
+        low = make_job(priority=0, run_at=now - timedelta(minutes=2))
+        late = make_job(priority=5, run_at=now - timedelta(minutes=1))
+        early = make_job(priority=5, run_at=now - timedelta(minutes=2))
+        same = make_job(priority=5, run_at=early.run_at)
+        make_job(priority=9, run_at=now + timedelta(minutes=1))
+        make_job(priority=9, status=Job.DONE)
+        self.assertEqual(
+            [job.id for job in claim(3)], [early.id, same.id, late.id]
+        )
+        self.assertEqual([job.id for job in claim(3)], [low.id])
+        self.assertEqual(claim(3), [])
+
+    def test_claim_marks_running(self):
+        job = make_job()
+        claimed, = claim(1)
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, Job.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNotNone(claimed.started)
+        self.assertIsNotNone(claimed.heartbeat)
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class SkipLockedTest(TransactionTestCase):
+    """Строки, заблокированные другим воркером, пропускаются без ожидания."""
+
+    def test_locked_job_is_skipped(self):
+        locked, free = make_job(priority=1), make_job()
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    Job.objects.select_for_update().get(id=locked.id)
+                    acquired.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(acquired.wait(10))
+            self.assertEqual([job.id for job in claim(2)], [free.id])
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual([job.id for job in claim(2)], [locked.id])
+
+
+@mock.patch('jobs.worker.connections')
+class RetryTest(TestCase):
+    """Повторы упавших задач и предел попыток."""
+
+    def setUp(self):
+        calls.clear()
+
+    def run_next(self):
+        Job.objects.filter(status=Job.QUEUED).update(run_at=timezone.now())
+        job, = claim(1)
+        with self.assertLogs('foodgram.jobs', 'INFO'):
+            execute(job)
+        return Job.objects.get(id=job.id)
+
+    def test_success(self, connections):
+        job = enqueue(record, value=1)
+        self.assertEqual(self.run_next().status, Job.DONE)
+        self.assertEqual(calls, [1])
+        self.assertEqual(job.max_attempts, 2)
+
+    def test_retries_until_max_attempts(self, connections):
+        enqueue(fail)
+        start = timezone.now()
+        job = self.run_next()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_at, start)
+        self.assertEqual(claim(1), [])
+        job = self.run_next()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished)
+
+    def test_unknown_task_fails(self, connections):
+        make_job(task='tests.missing', max_attempts=1)
+        job = self.run_next()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('Unknown task', job.last_error)
+
+    def test_schedule_uses_task_attempts(self, connections):
+        jobs = dict(settings.JOBS, SCHEDULE={
+            'record': {'task': 'tests.record', 'every': 60},
+        })
+        with override_settings(JOBS=jobs):
+            schedule()
+            schedule()
+            job = Job.objects.get(schedule='record')
+            self.assertEqual(job.max_attempts, 2)
+            job.kwargs = {'value': 2}
+            job.save()
+            self.assertEqual(self.run_next().status, Job.DONE)
+            following = Job.objects.get(
+                schedule='record', status=Job.QUEUED
+            )
+        self.assertGreater(following.run_at, job.run_at)
+
+
+class StaleTest(TestCase):
+    """Возврат в очередь задач, которые воркер перестал отмечать."""
+
+    def claim_job(self, **fields):
+        make_job(**fields)
+        job, = claim(1)
+        return job
+
+    def age(self, job, *fields):
+        Job.objects.filter(id=job.id).update(**{
+            name: timezone.now() - timedelta(
+                seconds=settings.JOBS['STALE_AFTER'] + 1
+            ) for name in fields
+        })
+
+    def test_long_job_with_heartbeat_keeps_running(self):
+        job = self.claim_job()
+        self.age(job, 'started', 'heartbeat')
+        heartbeat([job.id])
+        requeue_stale()
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.RUNNING)
+
+    def test_job_without_heartbeat_is_requeued(self):
+        job = self.claim_job()
+        self.age(job, 'started', 'heartbeat')
+        requeue_stale()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+
+    def test_stale_job_at_max_attempts_fails(self):
+        job = self.claim_job(max_attempts=1)
+        self.age(job, 'heartbeat')
+        requeue_stale()
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.FAILED)
+
+    def test_superseded_attempt_is_ignored(self):
+        first = self.claim_job()
+        self.age(first, 'heartbeat')
+        requeue_stale()
+        second, = claim(1)
+        finish(first, 'late failure')
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.attempts), (Job.RUNNING, 2))
+        self.assertEqual(second.last_error, 'Задача не завершилась вовремя.')
@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+from .queue import TASKS, retry_delay, schedule
+
+logger = logging.getLogger('foodgram.jobs')
+
+STALE_CHECK_INTERVAL = 60
+
+
+def claim(limit):
+    """Забирает до limit готовых задач; занятые другими воркерами пропускает.
+
+    Строки блокируются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    несколько воркеров не получают одну и ту же задачу и не ждут друг друга.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.QUEUED, run_at__lte=now
+            ).order_by('-priority', 'run_at', 'id').values_list(
+                'id', flat=True
+            )[:limit]
+        )
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, started=now, heartbeat=now,
+            attempts=F('attempts') + 1
+        )
+    return list(Job.objects.filter(id__in=ids).order_by(
+        '-priority', 'run_at', 'id'
+    ))
+
+
+@transaction.atomic
+def finish(job, error=None):
+    """Завершает попытку job.
+
+    Попытку, которую уже вернули в очередь как зависшую, не трогает: ее
+    результат не должен перезаписать состояние следующей попытки.
+    """
+    now = timezone.now()
+    jobs = Job.objects.filter(
+        id=job.id, status=Job.RUNNING, attempts=job.attempts
+    )
+    if error is None:
+        finished = jobs.update(status=Job.DONE, finished=now)
+    elif job.attempts < job.max_attempts:
+        jobs.update(
+            status=Job.QUEUED, last_error=error,
+            run_at=now + retry_delay(job.attempts)
+        )
+        return
+    else:
+        finished = jobs.update(
+            status=Job.FAILED, finished=now, last_error=error
+        )
+    if finished and job.schedule:
+        schedule([job.schedule])
+
+
+def execute(job):
+    try:
+        function = TASKS.get(job.task)
+        if function is None:
+            raise LookupError(f'Unknown task {job.task}')
+        start = time.perf_counter()
+        function(**job.kwargs)
+        logger.info('Job %s %s done in %.1f s', job.id, job.task,
+                    time.perf_counter() - start)
+        finish(job)
+    except Exception:
+        logger.exception('Job %s %s failed', job.id, job.task)
+        finish(job, traceback.format_exc())
+    finally:
+        connections.close_all()
+
+
+def heartbeat(ids):
+    """Отмечает, что воркер еще выполняет задачи ids."""
+    Job.objects.filter(id__in=ids, status=Job.RUNNING).update(
+        heartbeat=timezone.now()
+    )
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи воркеров, которые завершились аварийно.
+
+    Зависшей считается задача, которую воркер не отмечал дольше
+    STALE_AFTER секунд, а не задача, которая просто долго выполняется.
+    """
+    limit = timezone.now() - timedelta(seconds=settings.JOBS['STALE_AFTER'])
+    stale = Job.objects.filter(
+        Q(heartbeat__lt=limit)
+        | Q(heartbeat__isnull=True, started__lt=limit),
+        status=Job.RUNNING,
+    )
+    stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, last_error='Задача не завершилась вовремя.'
+    )
+    for job in stale:
+        finish(job, 'Задача не завершилась вовремя.')
+
+
+class Worker:
+    """Выполняет задачи из очереди в пуле потоков."""
+
+    def __init__(self, threads, poll_interval):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+
+    def stop(self):
+        self.stopping.set()
+
+    def run(self, once=False):
+        """Работает до вызова stop(); с once - пока в очереди есть задачи."""
+        autodiscover_modules('tasks')
+        schedule()
+        requeue_stale()
+        running = {}
+        last_check = last_beat = time.monotonic()
+        with ThreadPoolExecutor(self.threads) as executor:
+            while not self.stopping.is_set():
+                if time.monotonic() - last_check > STALE_CHECK_INTERVAL:
+                    requeue_stale()
+                    last_check = time.monotonic()
+                if (time.monotonic() - last_beat
+                        > settings.JOBS['HEARTBEAT_INTERVAL']):
+                    heartbeat(running.values())
+                    last_beat = time.monotonic()
+                free = self.threads - len(running)
+                jobs = claim(free) if free else []
+                running.update(
+                    (executor.submit(execute, job), job.id) for job in jobs
+                )
+                if once and not running:
+                    break
+                if running:
+                    done = wait(
+                        running, timeout=self.poll_interval,
+                        return_when=FIRST_COMPLETED
+                    ).done
+                    for future in done:
+                        del running[future]
+                else:
+                    self.stopping.wait(self.poll_interval)
+        connections.close_all()
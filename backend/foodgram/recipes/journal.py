@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import RecipeChange
+
+
+def record_change(recipe_id):
+    RecipeChange.objects.create(recipe_id=recipe_id)
+
+
+def record_changes(recipe_ids):
+    RecipeChange.objects.bulk_create(
+        RecipeChange(recipe_id=recipe_id) for recipe_id in recipe_ids
+    )
+
+
+def commit_lag():
+    return timedelta(seconds=settings.RECIPE_CHANGES_COMMIT_LAG_SECONDS)
+
+
+def journal_position():
+    """Позиция чтения журнала: номер последней записи и момент чтения."""
+    read_at = timezone.now()
+    last = RecipeChange.objects.aggregate(position=Max('id'))['position']
+    return last or 0, read_at
+
+
+def changes_since(position):
+    """Записи журнала (id, recipe_id, created), новые для позиции position.
+
+    Номер записи выдается при вставке, а видна она становится после
+    коммита, поэтому запись с меньшим номером может появиться позже записи
+    с большим. Кроме записей после номера позиции перечитываются записи,
+    созданные за RECIPE_CHANGES_COMMIT_LAG_SECONDS до момента чтения, так
+    что пропустить можно только транзакцию, которая идет дольше. Часть
+    записей может вернуться повторно.
+    """
+    last, read_at = position
+    return RecipeChange.objects.filter(
+        Q(id__gt=last) | Q(created__gte=read_at - commit_lag())
+    ).values_list('id', 'recipe_id', 'created')
+
+
+def changed_since(position):
+    """Рецепты, изменившиеся после позиции журнала position."""
+    return {recipe_id for _, recipe_id, _ in changes_since(position)}
+
+
+def retention():
+    return timedelta(days=settings.RECIPE_CHANGES_RETENTION_DAYS)
+
+
+def is_complete_since(built):
+    """Журнал хранит все изменения после момента built."""
+    return built >= timezone.now() - retention()
+
+
+def prune():
+    RecipeChange.objects.filter(
+        created__lt=timezone.now() - retention()
+    ).delete()
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from recipes.journal import prune
+from recipes.similarity import build_index
+
+
+class Command(BaseCommand):
+    help = 'build or incrementally refresh the similar recipes index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='recompute every recipe instead of changed ones'
+        )
+
+    def handle(self, *args, **options):
+        rows = build_index(full=options['full'])
+        prune()
+        self.stdout.write(f'Recomputed neighbors of {rows} recipes.')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from recipes.scores import recompute_scores
+
+
+class Command(BaseCommand):
+    help = 'recompute popular and trending recipe scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = recompute_scores(options['batch_size'])
+        self.stdout.write(f'Updated scores of {changed} recipes.')
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.3 on 2026-10-19 08:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def rename_column(old_name, new_name):
+    """Переименовывает столбец ингредиента, если в базе он еще старый.
+
+    В базах, схему которых создавали миграции, сгенерированные на сервере,
+    столбец может уже называться по-новому.
+    """
+
+    def rename(apps, schema_editor):
+        table = apps.get_model('recipes', 'Ingredient')._meta.db_table
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            columns = {
+                column.name for column in
+                connection.introspection.get_table_description(cursor, table)
+            }
+        if old_name in columns:
+            schema_editor.execute(schema_editor.sql_rename_column % {
+                'table': schema_editor.quote_name(table),
+                'old_column': schema_editor.quote_name(old_name),
+                'new_column': schema_editor.quote_name(new_name),
+            })
+
+    return rename
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Корзина покупок',
+                'verbose_name_plural': 'Корзина покупок',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='favoriterecipe',
+            options={'ordering': ('id',), 'verbose_name': 'Избранное', 'verbose_name_plural': 'Избранные рецепты'},
+        ),
+        migrations.AlterModelOptions(
+            name='ingredient',
+            options={'ordering': ('name',), 'verbose_name': 'Ингредиент', 'verbose_name_plural': 'Ингредиенты'},
+        ),
+        migrations.AlterModelOptions(
+            name='recipe',
+            options={'ordering': ('-id',), 'verbose_name': 'Рецепт', 'verbose_name_plural': 'Рецепты'},
+        ),
+        migrations.AlterModelOptions(
+            name='recipeingredient',
+            options={'verbose_name': 'Ингредиент в рецепте', 'verbose_name_plural': 'Ингредиенты в рецепте'},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'verbose_name': 'Тег', 'verbose_name_plural': 'Теги'},
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    rename_column('measurements_unit', 'measurement_unit'),
+                    rename_column('measurement_unit', 'measurements_unit'),
+                ),
+            ],
+            state_operations=[
+                migrations.RenameField(
+                    model_name='ingredient',
+                    old_name='measurements_unit',
+                    new_name='measurement_unit',
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='measurement_unit',
+            field=models.CharField(max_length=200, null=True, verbose_name='Единицы измерения'),
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorite_recipe', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+    ]
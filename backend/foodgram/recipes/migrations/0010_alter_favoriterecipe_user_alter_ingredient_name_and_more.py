@@ -0,0 +1,96 @@
+# Generated by Django 4.2.3 on 2026-10-19 08:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import utils.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_shoppingcart_alter_favoriterecipe_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorite_user', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='name',
+            field=models.CharField(max_length=200, verbose_name='Ингредиент'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='cooking_time',
+            field=models.PositiveIntegerField(validators=[utils.validators.validate_less_than_zero, utils.validators.validate_required], verbose_name='Время приготовления'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, default=None, null=True, upload_to='recipes/images/', verbose_name='Фото блюда'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='ingredients',
+            field=models.ManyToManyField(through='recipes.RecipeIngredient', to='recipes.ingredient', verbose_name='Ингредиенты'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='name',
+            field=models.CharField(max_length=200, verbose_name='Название рецепта'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='tags',
+            field=models.ManyToManyField(related_name='recipes', to='recipes.tag', verbose_name='Теги'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='text',
+            field=models.TextField(verbose_name='Описание'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='amount',
+            field=models.PositiveIntegerField(validators=[utils.validators.validate_less_than_zero], verbose_name='Количество'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='ingredient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_recipe', to='recipes.ingredient', verbose_name='Ингредиент'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.CharField(max_length=200, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('ingredient', 'recipe'), name='unique_ingredient_recipe'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_recipe', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_user', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+    ]
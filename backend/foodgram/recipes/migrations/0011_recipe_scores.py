@@ -0,0 +1,41 @@
+# Generated by Django 4.2.3 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_alter_favoriterecipe_user_alter_ingredient_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favoriterecipe',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, null=True, verbose_name='Дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность за последнее время'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, null=True, verbose_name='Дата добавления'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity', '-id'], name='recipe_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending', '-id'], name='recipe_trending_idx'),
+        ),
+    ]
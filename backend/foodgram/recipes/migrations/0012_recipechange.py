@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField(verbose_name='Рецепт')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение рецепта',
+                'verbose_name_plural': 'Изменения рецептов',
+                'ordering': ('id',),
+            },
+        ),
+    ]
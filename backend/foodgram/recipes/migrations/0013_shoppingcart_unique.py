@@ -0,0 +1,31 @@
+# Generated by Django 4.2.3 on 2026-10-19 09:19
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicates(apps, schema_editor):
+    """Оставляет в корзине по одной, самой ранней, записи на рецепт."""
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    duplicates = ShoppingCart.objects.order_by().values(
+        'user', 'recipe'
+    ).annotate(first=Min('id'), count=Count('id')).filter(count__gt=1)
+    for duplicate in duplicates:
+        ShoppingCart.objects.filter(
+            user=duplicate['user'], recipe=duplicate['recipe']
+        ).exclude(id=duplicate['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipechange'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='shopping_cart_user_recipe_unique'),
+        ),
+    ]
@@ -82,11 +82,31 @@ class Recipe(models.Model):
         default=None,
         blank=True,
     )
+    popularity = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+        editable=False
+    )
+    trending = models.FloatField(
+        verbose_name='Популярность за последнее время',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-popularity', '-id'],
+                name='recipe_popularity_idx'
+            ),
+            models.Index(
+                fields=['-trending', '-id'],
+                name='recipe_trending_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -139,6 +159,12 @@ class FavoriteRecipe(models.Model):
         verbose_name='Рецепт',
         on_delete=models.CASCADE
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        null=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -172,11 +198,41 @@ class ShoppingCart(models.Model):
         related_name='cart_user'
 
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        null=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ('-id',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='shopping_cart_user_recipe_unique'
+            )
+        ]
         verbose_name = 'Корзина покупок'
         verbose_name_plural = 'Корзина покупок'
 
     def __str__(self):
         return f'Рецепт {self.recipe} в корзине у {self.user}'
+
+
+class RecipeChange(models.Model):
+    """Журнал изменений рецептов для обновления поисковых индексов."""
+    recipe_id = models.BigIntegerField(verbose_name='Рецепт')
+    created = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now_add=True,
+        db_index=True
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Изменение рецепта'
+        verbose_name_plural = 'Изменения рецептов'
+
+    def __str__(self):
+        return f'Изменение рецепта {self.recipe_id}'
@@ -0,0 +1,121 @@
+import threading
+from collections import defaultdict
+
+import numpy as np
+from django.utils import timezone
+
+from .journal import (changes_since, commit_lag, is_complete_since,
+                      journal_position)
+from .models import RecipeIngredient
+
+EMPTY = np.zeros(0, dtype=np.int64)
+
+
+class PantryIndex:
+    """Инвертированный индекс ингредиент -> отсортированные id рецептов."""
+
+    def __init__(self):
+        self.position = journal_position()
+        self.applied = {}
+        self.built = timezone.now()
+        self.recipes = {}
+        self.ingredients = {}
+        pairs = RecipeIngredient.objects.order_by(
+            'ingredient_id', 'recipe_id'
+        ).values_list('ingredient_id', 'recipe_id')
+        recipes = defaultdict(list)
+        for ingredient_id, recipe_id in pairs.iterator():
+            recipes[ingredient_id].append(recipe_id)
+            self.ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+        for ingredient_id, recipe_ids in recipes.items():
+            self.recipes[ingredient_id] = np.unique(
+                np.array(recipe_ids, dtype=np.int64)
+            )
+
+    def remove(self, recipe_id):
+        for ingredient_id in self.ingredients.pop(recipe_id, ()):
+            recipe_ids = self.recipes.pop(ingredient_id)
+            if len(recipe_ids) > 1:
+                self.recipes[ingredient_id] = recipe_ids[
+                    recipe_ids != recipe_id
+                ]
+
+    def add(self, recipe_id, ingredient_ids):
+        self.ingredients[recipe_id] = ingredient_ids
+        for ingredient_id in ingredient_ids:
+            recipe_ids = self.recipes.get(ingredient_id, EMPTY)
+            self.recipes[ingredient_id] = np.insert(
+                recipe_ids, np.searchsorted(recipe_ids, recipe_id), recipe_id
+            )
+
+    def apply_changes(self):
+        """Обновляет рецепты из еще не примененных записей журнала.
+
+        Примененные записи запоминаются, пока журнал может вернуть их
+        повторно, чтобы не перечитывать их рецепты при каждом поиске.
+        """
+        position = journal_position()
+        entries = [
+            entry for entry in changes_since(self.position)
+            if entry[0] not in self.applied
+        ]
+        changed = {recipe_id for _, recipe_id, _ in entries}
+        current = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=changed
+        ).values_list('recipe_id', 'ingredient_id'):
+            current[recipe_id].add(ingredient_id)
+        for recipe_id in changed:
+            self.remove(recipe_id)
+            if current[recipe_id]:
+                self.add(recipe_id, current[recipe_id])
+        self.applied.update(
+            (entry_id, created) for entry_id, _, created in entries
+        )
+        horizon = position[1] - commit_lag()
+        self.applied = {
+            entry_id: created
+            for entry_id, created in self.applied.items()
+            if entry_id > position[0] or created >= horizon
+        }
+        self.position = position
+
+    def search(self, ingredient_ids, min_coverage=0.0):
+        """Id рецептов по убыванию доли ингредиентов, которые уже есть.
+
+        При равной доле выше рецепты с большим числом совпадений, затем
+        более новые.
+        """
+        matches = [self.recipes.get(ingredient_id, EMPTY)
+                   for ingredient_id in set(ingredient_ids)]
+        if not matches:
+            return []
+        recipe_ids, found = np.unique(
+            np.concatenate(matches), return_counts=True
+        )
+        sizes = np.fromiter(
+            (len(self.ingredients[recipe_id]) for recipe_id in recipe_ids),
+            dtype=np.int64, count=len(recipe_ids)
+        )
+        coverage = found / np.maximum(sizes, 1)
+        selected = coverage >= min_coverage
+        recipe_ids = recipe_ids[selected]
+        order = np.lexsort((
+            -recipe_ids, -found[selected], -coverage[selected]
+        ))
+        return recipe_ids[order].tolist()
+
+
+_lock = threading.Lock()
+_state = {'index': None}
+
+
+def get_pantry_index():
+    """Индекс воркера, догоняющий журнал изменений перед каждым поиском."""
+    with _lock:
+        index = _state['index']
+        if index is None or not is_complete_since(index.built):
+            index = _state['index'] = PantryIndex()
+        else:
+            index.apply_changes()
+        return index
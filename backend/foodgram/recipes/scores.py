@@ -0,0 +1,73 @@
+from collections import defaultdict
+from datetime import timedelta
+from math import exp, log
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import FavoriteRecipe, Recipe, ShoppingCart
+
+
+def activity_models():
+    options = settings.RECIPE_SCORES
+    return (
+        (FavoriteRecipe, options['FAVORITE_WEIGHT']),
+        (ShoppingCart, options['SHOPPING_CART_WEIGHT']),
+    )
+
+
+def popularity_scores():
+    """Взвешенное число добавлений рецепта в избранное и корзину."""
+    scores = defaultdict(float)
+    for model, weight in activity_models():
+        counts = model.objects.order_by().values_list('recipe_id').annotate(
+            count=Count('id')
+        )
+        for recipe_id, count in counts:
+            scores[recipe_id] += weight * count
+    return scores
+
+
+def trending_scores(now):
+    """Добавления за TRENDING_WINDOW_DAYS с экспоненциальным затуханием.
+
+    Вклад добавления уменьшается вдвое каждые TRENDING_HALF_LIFE_HOURS.
+    """
+    options = settings.RECIPE_SCORES
+    since = now - timedelta(days=options['TRENDING_WINDOW_DAYS'])
+    decay = log(2) / (options['TRENDING_HALF_LIFE_HOURS'] * 3600)
+    scores = defaultdict(float)
+    for model, weight in activity_models():
+        events = model.objects.filter(created__gte=since).values_list(
+            'recipe_id', 'created'
+        )
+        for recipe_id, created in events.iterator():
+            age = max((now - created).total_seconds(), 0)
+            scores[recipe_id] += weight * exp(-decay * age)
+    return scores
+
+
+def recompute_scores(batch_size=1000):
+    """Пересчитывает популярность рецептов, возвращает число изменений."""
+    popularity = popularity_scores()
+    trending = trending_scores(timezone.now())
+    changed = []
+    current = Recipe.objects.order_by().values_list(
+        'id', 'popularity', 'trending'
+    )
+    for recipe_id, old_popularity, old_trending in current.iterator():
+        new_popularity = round(popularity.get(recipe_id, 0.0), 6)
+        new_trending = round(trending.get(recipe_id, 0.0), 6)
+        if (new_popularity, new_trending) != (old_popularity, old_trending):
+            changed.append(Recipe(
+                id=recipe_id,
+                popularity=new_popularity,
+                trending=new_trending
+            ))
+    with transaction.atomic():
+        Recipe.objects.bulk_update(
+            changed, ('popularity', 'trending'), batch_size=batch_size
+        )
+    return len(changed)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .journal import record_change
+from .models import Recipe
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def journal_recipe_change(sender, instance, **kwargs):
+    record_change(instance.pk)
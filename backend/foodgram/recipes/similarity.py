@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+from .journal import changed_since, is_complete_since, journal_position
+from .models import RecipeIngredient
+
+MANIFEST = 'current.json'
+ARRAYS = ('recipe_ids', 'neighbors', 'scores')
+
+
+def index_dir():
+    return settings.SIMILARITY['INDEX_DIR']
+
+
+def ingredient_matrix():
+    """Бинарная матрица рецепт x ингредиент и отсортированные id рецептов."""
+    pairs = np.array(
+        RecipeIngredient.objects.order_by().values_list(
+            'recipe_id', 'ingredient_id'
+        ),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    ingredient_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(recipe_ids), len(ingredient_ids))
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return recipe_ids, matrix
+
+
+def similarity(overlap, size_a, size_b, metric):
+    if metric == 'jaccard':
+        return overlap / (size_a + size_b - overlap)
+    return overlap / np.sqrt(size_a * size_b)
+
+
+def top_neighbors(matrix, rows, k, metric, batch_size):
+    """Ближайшие k рецептов для строк rows, считается пачками."""
+    sizes = np.asarray(matrix.sum(axis=1)).ravel()
+    transposed = matrix.T.tocsc()
+    neighbors = np.full((len(rows), k), -1, dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        overlaps = (matrix[batch] @ transposed).tocsr()
+        for offset, row in enumerate(batch):
+            begin, end = overlaps.indptr[offset], overlaps.indptr[offset + 1]
+            columns = overlaps.indices[begin:end]
+            values = similarity(
+                overlaps.data[begin:end], sizes[row], sizes[columns], metric
+            )
+            values[columns == row] = 0
+            count = min(k, np.count_nonzero(values))
+            if not count:
+                continue
+            best = np.lexsort((columns, -values))[:count]
+            neighbors[start + offset, :count] = columns[best]
+            scores[start + offset, :count] = values[best]
+    return neighbors, scores
+
+
+class SimilarityIndex:
+    """Индекс похожих рецептов, загруженный через mmap."""
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        for name in ARRAYS:
+            setattr(self, name, np.load(
+                os.path.join(path, f'{name}.npy'), mmap_mode='r'
+            ))
+
+    def row(self, recipe_id):
+        position = np.searchsorted(self.recipe_ids, recipe_id)
+        if (position < len(self.recipe_ids)
+                and self.recipe_ids[position] == recipe_id):
+            return int(position)
+        return None
+
+    def similar(self, recipe_id, limit):
+        """Пары (id рецепта, сходство) по убыванию сходства."""
+        position = self.row(recipe_id)
+        if position is None:
+            return []
+        neighbors = self.neighbors[position, :limit]
+        found = neighbors >= 0
+        return list(zip(
+            self.recipe_ids[neighbors[found]].tolist(),
+            self.scores[position, :limit][found].tolist()
+        ))
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(index_dir(), MANIFEST)) as manifest:
+            return json.load(manifest)
+    except FileNotFoundError:
+        return None
+
+
+_loaded = {'version': None, 'index': None}
+
+
+def get_index():
+    """Текущий индекс; перечитывается, когда сборка выпускает новую версию."""
+    manifest = read_manifest()
+    if manifest is None:
+        return None
+    if _loaded['version'] != manifest['version']:
+        _loaded['index'] = SimilarityIndex(
+            os.path.join(index_dir(), manifest['version']), manifest
+        )
+        _loaded['version'] = manifest['version']
+    return _loaded['index']
+
+
+def reusable(index, k, metric):
+    """Старый индекс, если его строки можно переиспользовать."""
+    if (index is None or index.manifest['k'] != k
+            or index.manifest['metric'] != metric
+            or 'journal_read' not in index.manifest
+            or not is_complete_since(datetime.fromisoformat(
+                index.manifest['built']
+            ))):
+        return None
+    return index
+
+
+def stale_rows(index, recipe_ids, matrix, changed, metric):
+    """Строки, ближайшие соседи которых могли измениться.
+
+    Это новые и измененные рецепты, рецепты, у которых измененные были
+    в соседях, и рецепты, для которых измененные теперь ближе последнего
+    соседа. Возвращает маску строк и позиции строк в старом индексе.
+    """
+    old_ids = np.asarray(index.recipe_ids)
+    changed = np.fromiter(changed, dtype=np.int64)
+    if not len(old_ids):
+        return (np.ones(len(recipe_ids), dtype=bool),
+                np.zeros(len(recipe_ids), dtype=np.int64))
+    positions = np.minimum(
+        np.searchsorted(old_ids, recipe_ids), len(old_ids) - 1
+    )
+    stale = (old_ids[positions] != recipe_ids) | np.isin(recipe_ids, changed)
+    old_neighbors = np.asarray(index.neighbors)[positions]
+    present = old_neighbors >= 0
+    neighbor_ids = old_ids[np.where(present, old_neighbors, 0)]
+    gone = (
+        ~np.isin(neighbor_ids, recipe_ids) | np.isin(neighbor_ids, changed)
+    )
+    stale |= (gone & present).any(axis=1)
+    changed_rows = np.flatnonzero(np.isin(recipe_ids, changed))
+    if len(changed_rows):
+        sizes = np.asarray(matrix.sum(axis=1)).ravel()
+        overlaps = (matrix[changed_rows] @ matrix.T).tocoo()
+        values = similarity(
+            overlaps.data, sizes[changed_rows[overlaps.row]],
+            sizes[overlaps.col], metric
+        )
+        best = np.zeros(len(recipe_ids))
+        np.maximum.at(best, overlaps.col, values)
+        last = np.asarray(index.scores)[positions, -1]
+        stale |= (best > 0) & (best >= last)
+    return stale, positions
+
+
+def build_index(full=False):
+    """Собирает новую версию индекса, возвращает число пересчитанных строк."""
+    options = settings.SIMILARITY
+    k, metric = options['TOP_K'], options['METRIC']
+    position = journal_position()
+    recipe_ids, matrix = ingredient_matrix()
+    previous = None if full else reusable(get_index(), k, metric)
+    neighbors = np.full((len(recipe_ids), k), -1, dtype=np.int32)
+    scores = np.zeros((len(recipe_ids), k), dtype=np.float32)
+    if previous is None:
+        rows = np.arange(len(recipe_ids))
+    else:
+        stale, positions = stale_rows(
+            previous, recipe_ids, matrix,
+            changed_since((
+                previous.manifest['journal_position'],
+                datetime.fromisoformat(previous.manifest['journal_read'])
+            )), metric
+        )
+        reused = np.flatnonzero(~stale)
+        old = np.asarray(previous.neighbors)[positions[reused]]
+        old_ids = np.asarray(previous.recipe_ids)
+        mapped = np.searchsorted(
+            recipe_ids, old_ids[np.where(old >= 0, old, 0)]
+        )
+        neighbors[reused] = np.where(old >= 0, mapped, -1)
+        scores[reused] = np.asarray(previous.scores)[positions[reused]]
+        rows = np.flatnonzero(stale)
+    neighbors[rows], scores[rows] = top_neighbors(
+        matrix, rows, k, metric, options['BATCH_SIZE']
+    )
+    publish(
+        {'recipe_ids': recipe_ids, 'neighbors': neighbors, 'scores': scores},
+        {'k': k, 'metric': metric, 'journal_position': position[0],
+         'journal_read': position[1].isoformat()}
+    )
+    return len(rows)
+
+
+def publish(arrays, manifest):
+    """Записывает версию индекса и атомарно переключает на нее manifest."""
+    directory = index_dir()
+    version = f'{time.time_ns()}'
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), array)
+    manifest = dict(
+        manifest, version=version,
+        built=datetime.now(timezone.utc).isoformat()
+    )
+    temporary = os.path.join(directory, MANIFEST + '.tmp')
+    with open(temporary, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    previous = read_manifest()
+    os.replace(temporary, os.path.join(directory, MANIFEST))
+    keep = {version, previous and previous['version']}
+    for name in os.listdir(directory):
+        if name not in keep and name.isdigit():
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
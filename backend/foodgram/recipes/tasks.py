@@ -0,0 +1,17 @@
+from jobs.queue import task
+
+from .journal import prune
+from .scores import recompute_scores
+
+
+@task()
+def recompute_recipe_scores(batch_size=1000):
+    recompute_scores(batch_size)
+
+
+@task()
+def build_similarity_index(full=False):
+    from .similarity import build_index
+
+    build_index(full=full)
+    prune()
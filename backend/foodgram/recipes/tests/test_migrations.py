@@ -0,0 +1,52 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class ShoppingCartDedupMigrationTest(TransactionTestCase):
+    """0013 оставляет в корзине по одной записи на пару (user, recipe)."""
+
+    before = [('recipes', '0012_recipechange')]
+    after = [('recipes', '0013_shoppingcart_unique')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_keeps_first_row_per_pair(self):
+        apps = self.migrate(self.before)
+        user_model = apps.get_model('users', 'CustomUser')
+        recipe_model = apps.get_model('recipes', 'Recipe')
+        cart = apps.get_model('recipes', 'ShoppingCart')
+        users = [
+            user_model.objects.create(
+                email=f'user{number}@example.com', username=f'user{number}',
+                first_name='Имя', last_name='Фамилия'
+            ) for number in range(2)
+        ]
+        recipes = [
+            recipe_model.objects.create(
+                name=f'Рецепт {number}', text='Описание', cooking_time=5,
+                author=users[0]
+            ) for number in range(2)
+        ]
+        pairs = [
+            (users[0], recipes[0]), (users[0], recipes[0]),
+            (users[0], recipes[1]), (users[1], recipes[0]),
+            (users[1], recipes[0]), (users[1], recipes[0]),
+        ]
+        rows = [
+            cart.objects.create(user=user, recipe=recipe).id
+            for user, recipe in pairs
+        ]
+        apps = self.migrate(self.after)
+        cart = apps.get_model('recipes', 'ShoppingCart')
+        self.assertEqual(
+            sorted(cart.objects.values_list('id', flat=True)),
+            [rows[0], rows[2], rows[3]]
+        )